@@ -1,18 +1,31 @@
 import sys
+import re
 import requests
 import time
-from datetime import datetime
-import math
+import random
+from datetime import datetime, timezone
 import os
 import json
-from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QTableWidget, QTableWidgetItem,
-    QVBoxLayout, QWidget, QHeaderView, QPushButton, QTabWidget, QCheckBox
-)
-from PyQt5.QtGui import QColor, QBrush
-from PyQt5.QtCore import Qt
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+import glob
+import shutil
+import sqlite3
+import zipfile
+import tempfile
+import contextlib
+import threading
+import multiprocessing
+from collections import namedtuple
+from urllib.parse import urlsplit, unquote
+import csv
+import argparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import numpy as np
+
+# Analyse JSON incrémentale (optionnelle) : sans ijson, chaque archive est chargée en entier
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 # Ton pseudo chess.com
 username = 'blondletter'  # Changez ce nom pour utiliser un autre utilisateur
@@ -34,807 +47,2173 @@ end_date_str = ''    # Exemple : '30/04/2024'
 # - False : inclure uniquement les parties non classées (amicales)
 filter_rated = True  # Changez cette valeur selon vos besoins
 
-# Conversion des dates en objets datetime
-if start_date_str:
+# Modes de jeu proposés dans l'interface (complétés par ceux trouvés dans les archives)
+GAME_MODES = ['rapid', 'blitz', 'bullet', 'daily']
+
+# Filtres de type de partie proposés dans l'interface
+RATED_FILTERS = [
+    ('Classées', True),
+    ('Non classées', False),
+    ('Toutes', None)
+]
+
+# Fonctions de conversion des dates (format 'dd/mm/yyyy') en objets datetime
+# Une date vide ou invalide désactive la borne correspondante
+def parse_start_date(value):
+    if not value:
+        return None
     try:
-        start_date = datetime.strptime(start_date_str, '%d/%m/%Y')
+        return datetime.strptime(value, '%d/%m/%Y')
     except ValueError:
-        print(f"Date de début invalide : {start_date_str}. Utilisation de toutes les données disponibles.")
-        start_date = None
-else:
-    start_date = None
+        print(f"Date de début invalide : {value}. Utilisation de toutes les données disponibles.")
+        return None
 
-if end_date_str:
+def parse_end_date(value):
+    if not value:
+        return None
     try:
-        end_date = datetime.strptime(end_date_str, '%d/%m/%Y')
+        end_date = datetime.strptime(value, '%d/%m/%Y')
         # Ajouter 1 jour pour inclure la date de fin dans le filtrage
-        end_date = end_date.replace(hour=23, minute=59, second=59)
+        return end_date.replace(hour=23, minute=59, second=59)
     except ValueError:
-        print(f"Date de fin invalide : {end_date_str}. Utilisation de toutes les données disponibles.")
-        end_date = None
-else:
-    end_date = None
+        print(f"Date de fin invalide : {value}. Utilisation de toutes les données disponibles.")
+        return None
+
+# Conversion des dates en objets datetime
+start_date = parse_start_date(start_date_str)
+end_date = parse_end_date(end_date_str)
 
-# Ajouter un User-Agent à la requête
+# Adresse de l'API publique de chess.com (APPC_API_BASE permet de viser un serveur local, voir benchmarks/)
+API_BASE = os.environ.get('APPC_API_BASE', 'https://api.chess.com/pub')
+
+# Ajouter un User-Agent à la requête, et accepter les réponses compressées
 headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
+    'Accept-Encoding': 'gzip, deflate'
+}
+
+# Paramètres du client HTTP partagé (connexions réutilisées, nouvelles tentatives)
+# Délais (connexion, lecture) en secondes, par type de requête
+HTTP_TIMEOUTS = {
+    'archives': (5, 15),  # Liste des archives d'un joueur
+    'archive': (5, 60),  # Archive mensuelle (jusqu'à plusieurs Mo)
+    'stats': (5, 10)  # Classements d'un joueur
 }
+HTTP_MAX_RETRIES = 3  # Nombre de nouvelles tentatives après une réponse 429/5xx ou une erreur réseau
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+HTTP_BACKOFF_BASE = 0.5  # Premier délai d'attente (secondes), doublé à chaque tentative
+HTTP_BACKOFF_MAX = 30.0  # Délai d'attente maximal (secondes)
+
+# Paramètres du téléchargement parallèle des archives mensuelles
+# La concurrence démarre à ARCHIVE_INITIAL_CONCURRENCY puis s'ajuste entre les bornes :
+# elle diminue de moitié sur une réponse 429 ou une réponse lente, et augmente
+# progressivement tant que l'API répond rapidement.
+ARCHIVE_INITIAL_CONCURRENCY = 4
+ARCHIVE_MIN_CONCURRENCY = 1
+ARCHIVE_MAX_CONCURRENCY = 12
+ARCHIVE_SLOW_RESPONSE = 3.0  # Secondes au-delà desquelles une réponse est jugée lente
+ARCHIVE_MAX_RETRIES = 4  # Nombre de nouvelles tentatives après une réponse 429/5xx ou une erreur réseau
+ARCHIVE_CHUNK_SIZE = 64 * 1024  # Taille des blocs lus lors du téléchargement en flux
+ARCHIVE_FINAL_DELAY = 24 * 3600  # Délai (secondes) après la fin du mois avant qu'une archive soit jugée définitive
 
 # Définir le dossier de cache et la durée d'expiration
-CACHE_DIR = os.path.join('cache', username.lower(), game_mode)
+CACHE_DIR = 'cache'
 CACHE_EXPIRATION = 24 * 3600  # 24 heures en secondes
 
-# Assurez-vous que le dossier de cache existe
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
+# Classements des adversaires : chaque entrée expire après une durée tirée entre
+# (1 - CACHE_EXPIRATION_JITTER) et 1 fois CACHE_EXPIRATION, pour que les entrées d'une même
+# journée n'expirent pas toutes ensemble. Une entrée expirée reste servie (marquée périmée)
+# pendant CACHE_STALE_MAX_AGE, le temps d'être revalidée en arrière-plan.
+CACHE_EXPIRATION_JITTER = 0.2
+CACHE_STALE_MAX_AGE = 7 * 24 * 3600
+
+# Intervalle minimal (en secondes) entre deux mises à jour envoyées pendant une revalidation
+REVALIDATION_UPDATE_INTERVAL = 2.0
+
+# Base SQLite des classements des joueurs (dans le dossier de cache), partagée entre utilisateurs,
+# modes de jeu et processus : chaque entrée contient tous les classements chess_* renvoyés par /player/{name}/stats
+STATS_DB_NAME = 'stats.sqlite'
+STATS_CACHE_MAX_ENTRIES = 50000  # Au-delà, les entrées les moins récemment utilisées sont évincées
+STATS_DB_TIMEOUT = 30.0  # Secondes d'attente quand un autre processus écrit dans la base
+
+# Dossier de l'historique des parties traitées, en colonnes (cache/history/<utilisateur>, voir GameHistoryStore)
+HISTORY_CACHE_SUBDIR = 'history'
+
+# Index des ouvertures (cache/openings/<utilisateur>, un fichier par mois terminé, voir fetch_openings)
+OPENING_CACHE_SUBDIR = 'openings'
+OPENING_RATING_BAND = 200  # Largeur (Elo) des tranches de classement des adversaires
+OPENING_FALLBACK_PLIES = 4  # Demi-coups qui nomment une ouverture sans code ECO dans le PGN
+# Analyse des PGN : nombre de processus (un mois d'archive par tâche) ; un seul mois est lu dans ce processus
+OPENING_MAX_WORKERS = os.cpu_count() or 1
+
+# Dossier du cache des archives mensuelles (cache/archives/<utilisateur>)
+# Les mois terminés ne changent plus : ils sont conservés définitivement.
+# Seul le mois en cours est revalidé avec une requête conditionnelle (ETag / Last-Modified).
+ARCHIVE_CACHE_SUBDIR = 'archives'
+
+# Nombre maximal de requêtes simultanées pour les statistiques des adversaires
+STATS_MAX_WORKERS = 8
+
+# Durée de mémorisation (en secondes) des classements de l'utilisateur analysé
+USER_RATING_TTL = 10 * 60
+# Délai (en secondes) avant de refaire une requête en échec (hors ligne, limite de l'API) :
+# pendant ce délai, le dernier classement connu reste servi
+USER_RATING_RETRY_DELAY = 60
+
+# Intervalle minimal (en secondes) entre deux résultats partiels envoyés à l'interface
+PARTIAL_UPDATE_INTERVAL = 1.0
+
+# Traitement par lots de plusieurs joueurs (--batch) : nombre de processus et budget global
+# de requêtes par seconde vers l'API, partagé par tous les processus et tous leurs fils
+BATCH_MAX_WORKERS = 4
+BATCH_REQUEST_RATE = 8.0
+
+# Exception levée quand la récupération des données est annulée
+class FetchCancelled(Exception):
+    pass
+
+# Exception levée quand la liste des archives d'un joueur n'a pas pu être récupérée
+# (joueur inconnu, erreur de l'API ou du réseau)
+class ArchivesUnavailable(Exception):
+    pass
+
+# Cache des classements des joueurs dans une base SQLite unique (mode WAL)
+# Chaque entrée porte sa date d'expiration (avec une part aléatoire) et sa date de dernier accès
+# pour l'éviction LRU. Les entrées expirées sont conservées CACHE_STALE_MAX_AGE pour être servies périmées.
+# Les entrées importées des anciens caches par mode sont marquées incomplètes :
+# elles ne servent que pour les modes qu'elles contiennent.
+class StatsCache:
+    BATCH_SIZE = 500  # Nombre de paramètres par requête IN (limite SQLite)
+
+    def __init__(self, path, expiration=CACHE_EXPIRATION, max_entries=STATS_CACHE_MAX_ENTRIES,
+                 jitter=CACHE_EXPIRATION_JITTER, stale_max_age=CACHE_STALE_MAX_AGE):
+        self.path = path
+        self.expiration = expiration
+        self.max_entries = max_entries
+        self.jitter = jitter
+        self.stale_max_age = stale_max_age
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=STATS_DB_TIMEOUT, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS player_stats (
+                name TEXT PRIMARY KEY,
+                ratings TEXT NOT NULL,
+                complete INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.connection.execute('CREATE INDEX IF NOT EXISTS idx_stats_expires ON player_stats(expires_at)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS idx_stats_access ON player_stats(last_access)')
+        self.connection.commit()
+
+        self.migrate_legacy_caches(os.path.dirname(path))
+        self.purge_expired()
+
+    # Migration unique des anciens caches par utilisateur et par mode (cache/<user>/<mode>/) :
+    # fichiers <adversaire>.json et bases stats.sqlite
+    def migrate_legacy_caches(self, root):
+        legacy = {}  # pseudo -> (classements, horodatage)
+
+        def add(name, mode, elo, cache_time):
+            ratings, previous_time = legacy.get(name, ({}, cache_time))
+            ratings[f'chess_{mode}'] = elo
+            legacy[name] = (ratings, min(previous_time, cache_time))
+
+        json_files = [path for path in glob.glob(os.path.join(root, '*', '*', '*.json'))
+                      if os.path.relpath(path, root).split(os.sep)[0] not in (ARCHIVE_CACHE_SUBDIR, HISTORY_CACHE_SUBDIR)]
+        for cache_file in json_files:
+            mode = os.path.basename(os.path.dirname(cache_file))
+            try:
+                with open(cache_file, 'r') as f:
+                    data = json.load(f)
+                if data.get('timestamp'):
+                    name = os.path.splitext(os.path.basename(cache_file))[0].lower()
+                    add(name, mode, data.get('adversaire_elo_actuel_int'), data['timestamp'])
+            except (OSError, ValueError):
+                pass
+
+        db_files = glob.glob(os.path.join(root, '*', '*', 'stats.sqlite'))
+        for db_file in db_files:
+            mode = os.path.basename(os.path.dirname(db_file))
+            try:
+                with sqlite3.connect(db_file) as legacy_db:
+                    for name, elo, fetched_at in legacy_db.execute('SELECT name, elo, fetched_at FROM adversary_stats'):
+                        add(name, mode, elo, fetched_at)
+            except sqlite3.Error:
+                pass
+
+        if not json_files and not db_files:
+            return
+
+        with self.lock, self.connection:
+            for name, (ratings, cache_time) in legacy.items():
+                row = self.connection.execute(
+                    'SELECT ratings, complete FROM player_stats WHERE name = ?', (name,)
+                ).fetchone()
+                if row and row[1]:
+                    continue  # Une entrée complète existe déjà
+                if row:
+                    ratings = {**json.loads(row[0]), **ratings}
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO player_stats (name, ratings, complete, fetched_at, expires_at, last_access) '
+                    'VALUES (?, ?, 0, ?, ?, ?)',
+                    (name, json.dumps(ratings), cache_time, cache_time + self.expiration, cache_time)
+                )
+        for legacy_file in json_files + db_files:
+            for path in (legacy_file, legacy_file + '-wal', legacy_file + '-shm'):
+                if os.path.exists(path):
+                    os.remove(path)
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {len(legacy)} joueurs migrés vers {self.path}")
+
+    # Date d'expiration d'une entrée écrite maintenant
+    def expires_at(self, now):
+        return now + self.expiration * (1 - random.uniform(0, self.jitter))
+
+    # Lecture groupée : renvoie {pseudo en minuscules: {classement: elo}} pour les entrées
+    # encore valides qui couvrent tous les classements demandés
+    # stale : ensemble qui reçoit les pseudos des entrées expirées servies quand même
+    # (sans lui, les entrées expirées sont ignorées)
+    def get_many(self, names, rating_types, stale=None):
+        keys = list(dict.fromkeys(name.lower() for name in names))
+        now = time.time()
+        oldest = now - self.stale_max_age if stale is not None else now
+        found = {}
+        with self.lock, self.connection:
+            for i in range(0, len(keys), self.BATCH_SIZE):
+                batch = keys[i:i + self.BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                rows = self.connection.execute(
+                    f'SELECT name, ratings, complete, expires_at FROM player_stats WHERE name IN ({placeholders}) AND expires_at > ?',
+                    (*batch, oldest)
+                ).fetchall()
+                hits = []
+                for name, ratings, complete, expires_at in rows:
+                    ratings = json.loads(ratings)
+                    if complete or all(rating in ratings for rating in rating_types):
+                        found[name] = ratings
+                        hits.append(name)
+                        if expires_at <= now:
+                            stale.add(name)
+                # Mettre à jour la date de dernier accès pour l'éviction LRU
+                self.connection.executemany(
+                    'UPDATE player_stats SET last_access = ? WHERE name = ?',
+                    [(now, name) for name in hits]
+                )
+        return found
+
+    # Écriture groupée de {pseudo: {classement: elo}}, suivie de l'éviction si la taille maximale est dépassée
+    def put_many(self, entries):
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO player_stats (name, ratings, complete, fetched_at, expires_at, last_access) '
+                'VALUES (?, ?, 1, ?, ?, ?)',
+                [(name.lower(), json.dumps(ratings), now, self.expires_at(now), now) for name, ratings in entries.items()]
+            )
+            self._evict()
+
+    # Supprimer les entrées expirées depuis trop longtemps pour être servies périmées
+    def purge_expired(self):
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM player_stats WHERE expires_at <= ?', (time.time() - self.stale_max_age,))
+
+    def _evict(self):
+        (count,) = self.connection.execute('SELECT COUNT(*) FROM player_stats').fetchone()
+        if count > self.max_entries:
+            self.connection.execute(
+                'DELETE FROM player_stats WHERE name IN '
+                '(SELECT name FROM player_stats ORDER BY last_access ASC LIMIT ?)',
+                (count - self.max_entries,)
+            )
 
-# Fonction pour récupérer les statistiques d'un adversaire avec cache
-def get_adversary_stats(adversaire):
-    cache_file = os.path.join(CACHE_DIR, f"{adversaire.lower()}.json")
-
-    # Vérifier si le fichier de cache existe
-    if os.path.exists(cache_file):
-        # Lire le fichier de cache
-        with open(cache_file, 'r') as f:
-            data = json.load(f)
-        # Vérifier si le cache est expiré
-        cache_time = data.get('timestamp')
-        if cache_time and time.time() - cache_time < CACHE_EXPIRATION:
-            # Le cache est valide
-            adversaire_elo_actuel_int = data.get('adversaire_elo_actuel_int')
-            return adversaire_elo_actuel_int
+# Caches des classements ouverts par ce processus, un par dossier de cache
+# (une connexion SQLite ne se partage pas entre processus : chaque processus ouvre la sienne)
+_stats_caches = {}
+_stats_caches_lock = threading.Lock()
+
+# Fonction pour obtenir le cache des classements d'un dossier de cache, ouvert à la première utilisation
+def open_stats_cache(cache_dir):
+    with _stats_caches_lock:
+        if cache_dir not in _stats_caches:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            _stats_caches[cache_dir] = StatsCache(os.path.join(cache_dir, STATS_DB_NAME))
+        return _stats_caches[cache_dir]
+
+# Fonction pour fermer et oublier le cache des classements d'un dossier de cache
+def close_stats_cache(cache_dir):
+    with _stats_caches_lock:
+        stats_cache = _stats_caches.pop(cache_dir, None)
+    if stats_cache is not None:
+        stats_cache.connection.close()
+
+# Contexte d'une analyse : joueur, mode de jeu, filtres et dossier de cache
+# Toutes les fonctions de récupération le reçoivent en paramètre : plusieurs analyses peuvent
+# s'exécuter dans le même processus (ou dans des processus différents) sans état global partagé.
+class AnalysisContext:
+    def __init__(self, username, game_mode='rapid', filter_rated=True, start_date=None, end_date=None, cache_dir=CACHE_DIR):
+        self.username = username
+        self.game_mode = game_mode
+        self.filter_rated = filter_rated
+        self.start_date = start_date
+        self.end_date = end_date
+        self.cache_dir = cache_dir
+
+    @property
+    def rating_type(self):
+        return f'chess_{self.game_mode}'
+
+    # Cache des classements, ouvert dans le processus qui l'utilise (le contexte reste transmissible entre processus)
+    @property
+    def stats_cache(self):
+        return open_stats_cache(self.cache_dir)
+
+    # Dossier du cache des archives de l'utilisateur, créé si nécessaire
+    def archive_cache_dir(self):
+        path = os.path.join(self.cache_dir, ARCHIVE_CACHE_SUBDIR, self.username.lower())
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    # Dossier de l'historique des parties traitées de l'utilisateur, créé si nécessaire
+    def history_cache_dir(self):
+        path = os.path.join(self.cache_dir, HISTORY_CACHE_SUBDIR, self.username.lower())
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    # Dossier de l'index des ouvertures de l'utilisateur, créé si nécessaire
+    def opening_cache_dir(self):
+        path = os.path.join(self.cache_dir, OPENING_CACHE_SUBDIR, self.username.lower())
+        os.makedirs(path, exist_ok=True)
+        return path
+
+# Fonction pour créer le contexte d'analyse de la configuration en tête de fichier
+def default_context():
+    return AnalysisContext(username, game_mode, filter_rated, start_date, end_date, CACHE_DIR)
+
+# Budget de requêtes par seconde partagé entre processus
+# Chaque requête réserve le prochain créneau libre (horloge murale commune à tous les processus)
+# puis attend son heure : le débit global reste borné quel que soit le nombre de processus.
+class RequestBudget:
+    def __init__(self, rate, mp_context=multiprocessing):
+        self.interval = 1.0 / rate
+        self.lock = mp_context.Lock()
+        self.next_slot = mp_context.Value('d', 0.0, lock=False)
+
+    def acquire(self):
+        with self.lock:
+            now = time.time()
+            slot = max(now, self.next_slot.value)
+            self.next_slot.value = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+# Budget de requêtes du processus (None : aucune limite), installé par le traitement par lots
+request_budget = None
+
+# Instantané des réponses de l'API : un fichier zip compressé avec une entrée par réponse consommée
+# (liste des archives, archives mensuelles, classements) et un index des réponses par chemin.
+# En enregistrement, chaque réponse 200/404 reçue est ajoutée (la première réponse d'un chemin est conservée) ;
+# en relecture, les réponses sont servies depuis le fichier, sans aucune requête réseau.
+class HttpSnapshot:
+    INDEX_NAME = 'index.json'
+
+    def __init__(self, path, mode):
+        self.path = path
+        self.mode = mode  # 'record' ou 'replay'
+        self.lock = threading.Lock()
+        if mode == 'record':
+            self.archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+            self.index = {}
         else:
-            # Le cache est expiré, supprimer le fichier
-            os.remove(cache_file)
-
-    # Cache manquant ou expiré, faire la requête API
-    stats_url = f'https://api.chess.com/pub/player/{adversaire}/stats'
-    stats_response = requests.get(stats_url, headers=headers)
-
+            self.archive = zipfile.ZipFile(path, 'r')
+            with self.archive.open(self.INDEX_NAME) as f:
+                self.index = json.load(f)['responses']
+
+    # Clé d'une réponse : chemin de l'URL, sans l'adresse de l'API (un instantané enregistré
+    # sur un serveur local se relit tel quel) ni la casse des pseudos
+    @staticmethod
+    def key(url):
+        return urlsplit(url).path.rstrip('/').lower()
+
+    def record(self, url, response):
+        body = response.content  # Lit la réponse entière (iter_content la relit ensuite en mémoire)
+        key = self.key(url)
+        with self.lock:
+            if key in self.index:
+                return
+            member = f'{len(self.index):06d}'
+            self.archive.writestr(member, body)
+            self.index[key] = {'status': response.status_code, 'member': member}
+
+    # Réponse enregistrée pour une URL (404 si elle ne fait pas partie de l'instantané)
+    def replay(self, url):
+        entry = self.index.get(self.key(url))
+        response = requests.Response()
+        response.url = url
+        response.encoding = 'utf-8'
+        response._content_consumed = True
+        if entry is None:
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Réponse absente de l'instantané : {url}")
+            response.status_code = 404
+            response._content = b''
+            return response
+        with self.lock:
+            response._content = self.archive.read(entry['member'])
+        response.status_code = entry['status']
+        response.headers['Content-Type'] = 'application/json'
+        return response
+
+    def close(self):
+        with self.lock:
+            if self.mode == 'record':
+                self.archive.writestr(self.INDEX_NAME, json.dumps({
+                    'recorded_at': time.time(),
+                    'api_base': API_BASE,
+                    'responses': self.index
+                }))
+                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Instantané de {len(self.index)} réponses enregistré dans {self.path}")
+            self.archive.close()
+
+# Instantané du processus (None : accès direct à l'API), installé par snapshot_session
+http_snapshot = None
+
+# Client HTTP partagé par toutes les requêtes du processus
+# Une seule session : les connexions (TCP/TLS) sont conservées et réutilisées entre les fils.
+# Les réponses 429/5xx et les erreurs réseau sont retentées après le délai Retry-After de l'API,
+# ou sinon un délai exponentiel avec une part aléatoire (pour ne pas retenter tous en même temps).
+# Les compteurs (requêtes, nouvelles tentatives, échecs) sont tenus par type de requête.
+class HttpClient:
+    def __init__(self, pool_size):
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.lock = threading.Lock()
+        self.counters = {}
+
+    def count(self, endpoint, counter):
+        with self.lock:
+            counters = self.counters.setdefault(endpoint, {'requests': 0, 'retries': 0, 'failures': 0})
+            counters[counter] += 1
+
+    # Compteurs par type de requête : {type: {'requests': ..., 'retries': ..., 'failures': ...}}
+    def stats(self):
+        with self.lock:
+            return {endpoint: dict(counters) for endpoint, counters in self.counters.items()}
+
+    # Une seule tentative, dans le budget de requêtes (lève requests.RequestException en cas d'erreur réseau)
+    # En relecture d'un instantané, la réponse enregistrée est servie sans requête
+    def send(self, url, endpoint, request_headers=None, stream=False):
+        if http_snapshot is not None and http_snapshot.mode == 'replay':
+            return http_snapshot.replay(url)
+        if request_budget is not None:
+            request_budget.acquire()
+        self.count(endpoint, 'requests')
+        response = self.session.get(url, headers={**headers, **(request_headers or {})},
+                                    timeout=HTTP_TIMEOUTS[endpoint], stream=stream)
+        if http_snapshot is not None and response.status_code in (200, 404):
+            http_snapshot.record(url, response)
+        return response
+
+    # Délai avant la tentative suivante : Retry-After s'il est fourni, sinon exponentiel avec une part aléatoire
+    # (borné à [0, HTTP_BACKOFF_MAX] dans les deux cas : un Retry-After négatif ou démesuré ne bloque pas un fil)
+    def retry_delay(self, response, attempt):
+        if response is not None:
+            try:
+                return min(HTTP_BACKOFF_MAX, max(0.0, float(response.headers.get('Retry-After', ''))))
+            except ValueError:
+                pass
+        backoff = min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt)
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def wait_before_retry(self, endpoint, response, attempt):
+        self.count(endpoint, 'retries')
+        if response is not None:
+            response.close()
+        time.sleep(self.retry_delay(response, attempt))
+
+    # Requête GET avec nouvelles tentatives
+    # Renvoie la dernière réponse obtenue, ou None si aucune tentative n'a abouti (erreur réseau)
+    def get(self, url, endpoint, request_headers=None, stream=False, max_retries=HTTP_MAX_RETRIES):
+        response = None
+        for attempt in range(max_retries + 1):
+            try:
+                response = self.send(url, endpoint, request_headers, stream)
+            except requests.RequestException as e:
+                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Erreur réseau sur {url} : {e}")
+                response = None
+            if response is not None and response.status_code not in HTTP_RETRY_STATUSES:
+                break
+            if attempt < max_retries:
+                self.wait_before_retry(endpoint, response, attempt)
+        if response is None or response.status_code not in (200, 304, 404):
+            self.count(endpoint, 'failures')
+        return response
+
+http_client = HttpClient(pool_size=ARCHIVE_MAX_CONCURRENCY + STATS_MAX_WORKERS)
+
+# Fonction pour récupérer tous les classements chess_* d'un joueur depuis l'API (sans cache)
+# Renvoie {classement: elo}, vide si le joueur n'existe pas, None si la requête a échoué
+# (erreur temporaire : le résultat ne doit pas être mis en cache)
+def fetch_player_ratings(player):
+    stats_url = f'{API_BASE}/player/{player}/stats'
+    stats_response = http_client.get(stats_url, 'stats')
+
+    if stats_response is None or stats_response.status_code not in (200, 404):
+        return None
+    ratings = {}
     if stats_response.status_code == 200:
-        stats = stats_response.json()
-        adversaire_elo_actuel = stats.get(rating_type, {}).get('last', {}).get('rating', None)
-    else:
-        adversaire_elo_actuel = None
-
+        for key, value in stats_response.json().items():
+            if not key.startswith('chess') or not isinstance(value, dict):
+                continue
+            try:
+                ratings[key] = int(value.get('last', {}).get('rating', None))
+            except (ValueError, TypeError):
+                ratings[key] = None
+    return ratings
+
+# Service de consultation des classements, mémorisés en mémoire pendant une durée limitée
+# Partagé par tous les widgets : les redessins ne font aucune requête tant que l'entrée est valide
+class RatingService:
+    def __init__(self, ttl, retry_delay=USER_RATING_RETRY_DELAY):
+        self.ttl = ttl
+        self.retry_delay = retry_delay
+        self.entries = {}  # pseudo en minuscules -> (échéance, {classement: elo})
+        self.lock = threading.Lock()
+
+    # Tous les classements d'un joueur (requête uniquement si absents ou expirés)
+    def get_ratings(self, player):
+        with self.lock:
+            entry = self.entries.get(player.lower())
+        if entry is not None and time.monotonic() < entry[0]:
+            return entry[1]
+
+        ratings = fetch_player_ratings(player)
+        with self.lock:
+            if ratings is None:
+                # Échec temporaire : le dernier classement connu (vide s'il n'y en a pas) reste servi,
+                # et la requête n'est refaite qu'après retry_delay
+                ratings = entry[1] if entry is not None else {}
+                self.entries[player.lower()] = (time.monotonic() + self.retry_delay, ratings)
+            else:
+                self.entries[player.lower()] = (time.monotonic() + self.ttl, ratings)
+        return ratings
+
+    # Classements mémorisés d'un joueur, même expirés, sans jamais faire de requête
+    # (lus par l'interface et les calculs ; get_ratings les récupère et les rafraîchit en amont)
+    def cached_ratings(self, player):
+        with self.lock:
+            entry = self.entries.get(player.lower())
+        return entry[1] if entry is not None else {}
+
+    def cached_rating(self, player, player_rating_type):
+        return self.cached_ratings(player).get(player_rating_type)
+
+    # Faire expirer les classements d'un joueur : la prochaine consultation refera la requête
+    # (en cas d'échec, les derniers classements connus restent servis)
+    # Sans joueur, tous les classements sont oubliés
+    def invalidate(self, player=None):
+        with self.lock:
+            if player is None:
+                self.entries.clear()
+            elif player.lower() in self.entries:
+                self.entries[player.lower()] = (0, self.entries[player.lower()][1])
+
+rating_service = RatingService(USER_RATING_TTL)
+
+# Enregistrer (mode 'record') ou relire (mode 'replay') les réponses de l'API dans un instantané
+# Renvoie un dossier de cache temporaire, vide, à utiliser pour les analyses de la session : sans cache,
+# chaque réponse consommée passe par le client HTTP, et une relecture reproduit exactement l'analyse.
+#   with snapshot_session('analyse.zip', 'replay') as cache_dir:
+#       data = fetch_data(AnalysisContext('blondletter', cache_dir=cache_dir))
+@contextlib.contextmanager
+def snapshot_session(path, mode):
+    global http_snapshot
+    http_snapshot = HttpSnapshot(path, mode)
+    cache_dir = tempfile.mkdtemp(prefix='appc-snapshot-')
+    # Les classements mémorisés de l'utilisateur doivent eux aussi passer par l'instantané
+    rating_service.invalidate()
     try:
-        adversaire_elo_actuel_int = int(adversaire_elo_actuel)
-    except (ValueError, TypeError):
-        adversaire_elo_actuel_int = None
-
-    # Enregistrer dans le cache
-    data = {
-        'timestamp': time.time(),
-        'adversaire_elo_actuel_int': adversaire_elo_actuel_int
-    }
+        yield cache_dir
+    finally:
+        snapshot, http_snapshot = http_snapshot, None
+        snapshot.close()
+        close_stats_cache(cache_dir)
+        close_history_stores(cache_dir)
+        shutil.rmtree(cache_dir, ignore_errors=True)
 
-    # S'assurer que le dossier de cache existe
-    if not os.path.exists(CACHE_DIR):
-        os.makedirs(CACHE_DIR)
-
-    with open(cache_file, 'w') as f:
-        json.dump(data, f)
-
-    return adversaire_elo_actuel_int
-
-# Fonction pour récupérer les données
-def fetch_data():
-    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Début de la récupération des données")
-    games_url = f'https://api.chess.com/pub/player/{username}/games/archives'
-    archives_response = requests.get(games_url, headers=headers)
-
-    if archives_response.status_code == 200:
-        archives = archives_response.json()['archives']
-        adversaires_data = []
-        unique_adversaries = {}  # Dictionnaire pour stocker les adversaires uniques
-        user_elo_history = []  # Liste pour stocker l'historique de l'Elo du joueur
-
-        for archive_url in archives:
-            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Récupération des parties depuis l'archive : {archive_url}")
-            games_response = requests.get(archive_url, headers=headers)
-
-            if games_response.status_code == 200:
-                games = games_response.json().get('games', [])
-
-                for game in games:
-                    # Filtrer par mode de jeu
-                    if game['time_class'] != game_mode:
-                        continue
-
-                    # Filtrer par type de partie (classée ou non classée)
-                    if filter_rated is not None:
-                        if game.get('rated', False) != filter_rated:
-                            continue
-
-                    white_player = game['white']['username']
-                    black_player = game['black']['username']
-                    white_elo = game['white']['rating']
-                    black_elo = game['black']['rating']
-                    date_timestamp = game['end_time']
-
-                    # Convertir le timestamp en objet datetime
-                    date_played = datetime.fromtimestamp(date_timestamp)
-
-                    # Filtrer par date si une plage est spécifiée
-                    if start_date and date_played < start_date:
-                        continue
-                    if end_date and date_played > end_date:
-                        continue
-
-                    # Déterminer la couleur du joueur et l'adversaire
-                    if white_player.lower() == username.lower():
-                        adversaire = black_player
-                        adversaire_elo_initial = black_elo
-                        player_elo_initial = white_elo
-                        user_color = 'white'
-                        user_result = game['white'].get('result', '')
-                    elif black_player.lower() == username.lower():
-                        adversaire = white_player
-                        adversaire_elo_initial = white_elo
-                        player_elo_initial = black_elo
-                        user_color = 'black'
-                        user_result = game['black'].get('result', '')
-                    else:
-                        continue
-
-                    if adversaire.lower() == username.lower():
-                        continue
-
-                    # Ajouter l'Elo du joueur à l'historique
-                    user_elo_history.append((date_played, player_elo_initial))
-
-                    # Récupérer l'Elo actuel de l'adversaire avec le cache
-                    if adversaire.lower() not in unique_adversaries:
-                        adversaire_elo_actuel_int = get_adversary_stats(adversaire)
-                        unique_adversaries[adversaire.lower()] = adversaire_elo_actuel_int
-                    else:
-                        adversaire_elo_actuel_int = unique_adversaries[adversaire.lower()]
-
-                    try:
-                        adversaire_elo_initial_int = int(adversaire_elo_initial)
-                        progression = adversaire_elo_actuel_int - adversaire_elo_initial_int if adversaire_elo_actuel_int is not None else 0
-                    except ValueError:
-                        continue
-
-                    # Déterminer le résultat de la partie
-                    if user_result == 'win':
-                        result_symbol = 'W'  # Victoire
-                    elif user_result in ['checkmated', 'timeout', 'resigned', 'lose']:
-                        result_symbol = 'L'  # Défaite
-                    elif user_result in ['stalemate', 'agreed', 'repetition', 'timevsinsufficient', 'insufficient', '50move', 'draw']:
-                        result_symbol = 'D'  # Match nul
-                    else:
-                        result_symbol = '?'  # Résultat indéterminé
-
-                    # Déterminer le symbole de la couleur jouée
-                    color_symbol = 'B' if user_color == 'white' else 'N'
-
-                    # Calcul du score de progression P
-                    E_initial = adversaire_elo_initial_int
-                    E_final = adversaire_elo_actuel_int if adversaire_elo_actuel_int is not None else E_initial
-                    N_parties = 1  # Puisque chaque ligne représente une partie
-                    months = 1  # Nous considérons que la progression se fait sur 1 mois pour chaque partie
-
-                    if E_initial == 0 or E_final == 0:
-                        P = 0
-                    else:
-                        P = (math.log2(E_final / E_initial)) * (12 / months) * (1 + (1 / N_parties))
-
-                    # Arrondir P à deux décimales
-                    P = round(P, 2)
-
-                    adversaires_data.append({
-                        'note_progression': P,
-                        'date_played': date_played,
-                        'adversaire': adversaire,
-                        'adversaire_elo_initial': adversaire_elo_initial_int,
-                        'player_elo_initial': player_elo_initial,
-                        'progression': progression,
-                        'adversaire_elo_actuel': adversaire_elo_actuel_int if adversaire_elo_actuel_int is not None else 'Inconnu',
-                        'color_symbol': color_symbol,
-                        'result_symbol': result_symbol
-                    })
-        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Récupération des données terminée")
-        return adversaires_data, unique_adversaries, user_elo_history
-    else:
-        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Échec de la requête : {archives_response.status_code}")
-        return [], {}, []
-
-# Sous-classe pour les éléments numériques
-class NumericTableWidgetItem(QTableWidgetItem):
-    def __init__(self, value):
-        super().__init__(str(value))
-        self.value = value
-
-    def __lt__(self, other):
-        if isinstance(other, NumericTableWidgetItem):
-            return self.value < other.value
-        else:
-            return QTableWidgetItem.__lt__(self, other)
-
-# Sous-classe pour les dates
-class DateTableWidgetItem(QTableWidgetItem):
-    def __init__(self, date_value):
-        super().__init__(date_value.strftime('%d/%m/%Y'))
-        self.date_value = date_value
-
-    def __lt__(self, other):
-        if isinstance(other, DateTableWidgetItem):
-            return self.date_value < other.date_value
-        else:
-            return QTableWidgetItem.__lt__(self, other)
-
-# Classe pour le nouvel histogramme des Elos actuels des adversaires
-class EloHistogram(QWidget):
-    def __init__(self, adversaries_elo, parent_app):
-        super().__init__()
-        self.adversaries_elo_original = adversaries_elo.copy()  # Faire une copie pour éviter les modifications
-        self.parent_app = parent_app
-        self.show_user = True  # Par défaut, afficher l'Elo de l'utilisateur
-
-        self.init_ui()
-
-    def init_ui(self):
-        layout = QVBoxLayout()
-        self.setLayout(layout)
-
-        # Ajouter le graphique
-        self.figure = plt.figure()
-        self.canvas = FigureCanvas(self.figure)
-        layout.addWidget(self.canvas)
-
-        # Ajouter une case à cocher pour afficher/masquer l'Elo de l'utilisateur
-        self.checkbox = QCheckBox("Afficher mon Elo")
-        self.checkbox.setChecked(True)
-        self.checkbox.stateChanged.connect(self.update_graph)
-        layout.addWidget(self.checkbox)
-
-        self.plot_graph()
-
-    def plot_graph(self):
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-
-        # Créer une copie locale du dictionnaire pour éviter les modifications
-        adversaries_elo_copy = self.adversaries_elo_original.copy()
-
-        # Données des adversaires
-        data_pairs = [(adv, elo) for adv, elo in adversaries_elo_copy.items() if elo is not None]
-        data_pairs.sort(key=lambda x: x[1])  # Tri par Elo ascendant
-        adversaires_sorted, elos_sorted = zip(*data_pairs) if data_pairs else ([], [])
-
-        # Convertir en listes pour pouvoir les modifier
-        adversaires_sorted = list(adversaires_sorted)
-        elos_sorted = list(elos_sorted)
-        colors = ['blue'] * len(adversaires_sorted)
-
-        # Afficher l'Elo de l'utilisateur si coché
-        if self.checkbox.isChecked():
-            # Récupérer l'Elo actuel de l'utilisateur
-            user_stats_url = f'https://api.chess.com/pub/player/{username}/stats'
-            user_stats_response = requests.get(user_stats_url, headers=headers)
-            if user_stats_response.status_code == 200:
-                user_stats = user_stats_response.json()
-                user_elo_actuel = user_stats.get(rating_type, {}).get('last', {}).get('rating', None)
+# Fonction pour récupérer les statistiques d'un adversaire avec cache
+def get_adversary_stats(context, adversaire):
+    return resolve_player_ratings(context, [adversaire], {context.rating_type})[adversaire.lower()].get(context.rating_type)
+
+# Fonction pour récupérer en parallèle les classements de plusieurs joueurs et les enregistrer dans le cache
+# on_result(pseudo en minuscules, classements) est appelée après chaque joueur (classements None en cas
+# d'échec temporaire, rien n'est alors mis en cache) ; cancel_event permet d'interrompre la récupération
+# (les classements déjà récupérés sont tout de même enregistrés). Renvoie le nombre d'échecs.
+def download_player_ratings(context, players, on_result=None, cancel_event=None):
+    fetched = {}
+    failures = 0
+    executor = ThreadPoolExecutor(max_workers=STATS_MAX_WORKERS)
+    try:
+        futures = {executor.submit(fetch_player_ratings, player): player for player in players}
+        for future in as_completed(futures):
+            name = futures[future].lower()
+            ratings = future.result()
+            if ratings is None:
+                failures += 1
             else:
-                user_elo_actuel = None
-
-            if user_elo_actuel is not None:
-                # Trouver la position pour insérer l'utilisateur
-                inserted = False
-                for i, elo in enumerate(elos_sorted):
-                    if user_elo_actuel <= elo:
-                        adversaires_sorted.insert(i, username)
-                        elos_sorted.insert(i, user_elo_actuel)
-                        colors.insert(i, 'gold')
-                        inserted = True
-                        user_index = i
-                        break
-                if not inserted:
-                    adversaires_sorted.append(username)
-                    elos_sorted.append(user_elo_actuel)
-                    colors.append('gold')
-                    user_index = len(elos_sorted) - 1
+                fetched[name] = ratings
+            if on_result is not None:
+                on_result(name, ratings)
+            if cancel_event is not None and cancel_event.is_set():
+                raise FetchCancelled()
+    finally:
+        executor.shutdown(cancel_futures=True)
+        # Enregistrer tous les classements récupérés (tous modes confondus) en une seule transaction
+        context.stats_cache.put_many(fetched)
+    return failures
+
+# Fonction pour résoudre les classements d'un ensemble d'adversaires uniques
+# Les entrées du cache sont servies directement, les manquantes sont récupérées en parallèle.
+# Renvoie un dictionnaire {pseudo en minuscules: {classement: elo}} dans l'ordre des adversaires fournis
+# on_result(pseudo, classements) est appelée après chaque adversaire récupéré ; cancel_event permet d'interrompre
+# la résolution (les classements déjà récupérés sont tout de même enregistrés)
+# stale : ensemble qui reçoit les adversaires servis depuis une entrée expirée, à revalider ensuite
+# (sans lui, les entrées expirées sont récupérées à nouveau avant de répondre)
+def resolve_player_ratings(context, adversaires, rating_types, on_result=None, cancel_event=None, stale=None):
+    resolved = context.stats_cache.get_many(adversaires, rating_types, stale)
+    misses = [adversaire for adversaire in adversaires if adversaire.lower() not in resolved]
+
+    if misses:
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {len(resolved)} adversaires en cache, {len(misses)} à récupérer")
+
+        def on_download(name, ratings):
+            # Échec temporaire : Elo actuel inconnu pour cette analyse
+            resolved[name] = ratings if ratings is not None else {}
+            if on_result is not None:
+                on_result(name, resolved[name])
+
+        failures = download_player_ratings(context, misses, on_download, cancel_event)
+        if failures:
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Classements indisponibles pour {failures} adversaires")
+
+    # Conserver l'ordre de première apparition des adversaires
+    return {adversaire.lower(): resolved[adversaire.lower()] for adversaire in adversaires}
+
+# Limiteur de concurrence adaptatif (augmentation additive, diminution multiplicative)
+class AdaptiveLimiter:
+    def __init__(self, initial, minimum, maximum):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.active = 0
+        self.successes = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.active >= self.limit:
+                self.condition.wait()
+            self.active += 1
+
+    def release(self, throttled, elapsed):
+        with self.condition:
+            self.active -= 1
+            if throttled or elapsed > ARCHIVE_SLOW_RESPONSE:
+                # L'API sature : réduire de moitié la concurrence
+                self.limit = max(self.minimum, self.limit // 2)
+                self.successes = 0
             else:
-                # Si l'Elo de l'utilisateur n'est pas disponible, ne rien faire
-                user_index = None
+                # Une fenêtre complète de réponses rapides : autoriser une requête de plus
+                self.successes += 1
+                if self.successes >= self.limit:
+                    self.limit = min(self.maximum, self.limit + 1)
+                    self.successes = 0
+            self.condition.notify_all()
+
+# Fonction pour télécharger une archive mensuelle en respectant le limiteur
+# La réponse est lue en flux : on_success est appelée avec une réponse 200 tant que la
+# requête occupe encore sa place dans le limiteur, pour y consommer le corps
+# Les nouvelles tentatives sont faites ici (et non par http_client.get) pour que chaque tentative
+# passe par le limiteur et lui signale les saturations.
+# Renvoie la dernière réponse obtenue, ou None si aucune tentative n'a abouti (erreur réseau)
+def download_archive(archive_url, limiter, request_headers=None, on_success=None):
+    for attempt in range(ARCHIVE_MAX_RETRIES + 1):
+        limiter.acquire()
+        start = time.monotonic()
+        response = None
+        failed = False
+        try:
+            response = http_client.send(archive_url, 'archive', request_headers, stream=True)
+            if response.status_code == 200 and on_success is not None:
+                on_success(response)
+        except requests.RequestException as e:
+            # Erreur réseau, y compris pendant la lecture du corps : nouvelle tentative
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Erreur réseau sur {archive_url} : {e}")
+            failed = True
+        finally:
+            # Une erreur réseau est traitée comme une saturation de l'API
+            throttled = failed or response is None or response.status_code in HTTP_RETRY_STATUSES
+            limiter.release(throttled, time.monotonic() - start)
+
+        if not failed and response.status_code not in HTTP_RETRY_STATUSES:
+            return response
+        if attempt < ARCHIVE_MAX_RETRIES:
+            # Attendre le délai demandé par l'API (ou un délai exponentiel avec une part aléatoire)
+            http_client.wait_before_retry('archive', response, attempt)
+
+    http_client.count('archive', 'failures')
+    return None if failed else response
+
+# Fonction pour obtenir la clé du mois d'une archive (.../games/YYYY/MM -> YYYY_MM)
+def archive_month_key(archive_url):
+    year, month = archive_url.rstrip('/').split('/')[-2:]
+    return f"{year}_{month}"
+
+# Fonction pour obtenir les chemins du cache d'une archive
+def archive_cache_paths(context, archive_url):
+    base = os.path.join(context.archive_cache_dir(), archive_month_key(archive_url))
+    return base + '.json', base + '.meta.json'
+
+# Fonction pour savoir si une archive récupérée à l'instant fetched_at est définitive
+# Les parties terminées juste avant la fin du mois peuvent apparaître dans l'archive avec retard :
+# seule une archive récupérée ARCHIVE_FINAL_DELAY après la fin de son mois est définitive
+def is_fetched_final(archive_url, fetched_at):
+    return fetched_at >= archive_month_end(archive_url) + ARCHIVE_FINAL_DELAY
+
+# Fonction pour savoir si l'archive en cache est définitive
+def is_archive_final(context, archive_url):
+    _, meta_file = archive_cache_paths(context, archive_url)
+    try:
+        with open(meta_file, 'r') as f:
+            return is_fetched_final(archive_url, json.load(f).get('fetched_at', 0))
+    except (OSError, ValueError):
+        return False
+
+# Fonctions pour calculer les instants (UTC) où le mois d'une archive commence et se termine
+def archive_month_start(archive_url):
+    year, month = (int(part) for part in archive_url.rstrip('/').split('/')[-2:])
+    return datetime(year, month, 1, tzinfo=timezone.utc).timestamp()
+
+def archive_month_end(archive_url):
+    year, month = (int(part) for part in archive_url.rstrip('/').split('/')[-2:])
+    if month == 12:
+        year, month = year + 1, 0
+    return datetime(year, month + 1, 1, tzinfo=timezone.utc).timestamp()
+
+# Fonction pour sélectionner les archives dont le mois chevauche la plage de dates du contexte
+# Les archives sont découpées par mois UTC et les dates de la plage sont en heure locale :
+# la comparaison se fait sur les instants (timestamps), un mois voisin qui contient encore
+# des parties de la plage à cause du fuseau horaire est donc conservé.
+# Le filtrage exact reste fait partie par partie (date_mask).
+def select_archives(context, archive_urls):
+    start = context.start_date.timestamp() if context.start_date else None
+    end = context.end_date.timestamp() if context.end_date else None
+    return [
+        archive_url for archive_url in archive_urls
+        if (start is None or archive_month_end(archive_url) > start)
+        and (end is None or archive_month_start(archive_url) <= end)
+    ]
+
+# Champs conservés pour chaque partie des archives
+# (projection précoce : le PGN et les autres champs volumineux sont ignorés dès la lecture)
+ArchiveGame = namedtuple('ArchiveGame', [
+    'url', 'time_class', 'rated', 'end_time',
+    'white_username', 'white_rating', 'white_result',
+    'black_username', 'black_rating', 'black_result'
+])
+
+# Fonction pour réduire une partie brute de l'API aux seuls champs utilisés
+def project_game(game):
+    white = game['white']
+    black = game['black']
+    return ArchiveGame(
+        game.get('url', ''), game['time_class'], game.get('rated', False), game['end_time'],
+        white['username'], white['rating'], white.get('result', ''),
+        black['username'], black['rating'], black.get('result', '')
+    )
+
+# Générateur des parties brutes d'une archive en cache, analysées au fil de la lecture
+def iter_raw_archive(archive_file):
+    with open(archive_file, 'rb') as f:
+        if ijson is not None:
+            yield from ijson.items(f, 'games.item')
         else:
-            user_index = None
-
-        # Recréer l'histogramme avec les données mises à jour
-        ax.bar(adversaires_sorted, elos_sorted, color=colors)
-
-        # Ajouter une flèche pour indiquer la position de l'utilisateur
-        if user_index is not None:
-            ax.annotate(
-                'Vous êtes ici',
-                xy=(user_index, elos_sorted[user_index]),
-                xytext=(user_index, max(elos_sorted) * 1.05),
-                arrowprops=dict(facecolor='red', shrink=0.05, width=2, headwidth=8),
-                ha='center',
-                color='red',
-                fontsize=12
+            yield from json.load(f).get('games', [])
+
+# Générateur des parties d'une archive en cache, réduites aux champs utilisés
+def iter_cached_archive(archive_file):
+    for game in iter_raw_archive(archive_file):
+        yield project_game(game)
+
+# Fonction pour écrire une archive dans le cache en flux (écriture atomique)
+def write_cached_archive(context, archive_url, response):
+    archive_file, meta_file = archive_cache_paths(context, archive_url)
+    tmp_path = archive_file + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        for chunk in response.iter_content(ARCHIVE_CHUNK_SIZE):
+            f.write(chunk)
+    os.replace(tmp_path, archive_file)
+
+    write_archive_meta(meta_file, {
+        'fetched_at': time.time(),
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified')
+    })
+
+# Fonction pour écrire les métadonnées d'une archive en cache (écriture atomique)
+def write_archive_meta(meta_file, meta):
+    tmp_path = meta_file + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_file)
+
+# Fonction pour mettre une archive à disposition dans le cache, en la téléchargeant si nécessaire
+# Renvoie le chemin du fichier en cache, ou None si l'archive n'a pas pu être récupérée
+def load_archive(context, archive_url, limiter):
+    archive_file, meta_file = archive_cache_paths(context, archive_url)
+
+    meta = None
+    if os.path.exists(archive_file) and os.path.exists(meta_file):
+        try:
+            with open(meta_file, 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            # Métadonnées illisibles (écriture interrompue) : l'archive est récupérée à nouveau
+            meta = None
+        # Un mois récupéré après sa fin est définitif : aucune requête nécessaire
+        if meta and is_fetched_final(archive_url, meta.get('fetched_at', 0)):
+            return archive_file
+
+    # Mois en cours (ou jamais récupéré) : requête conditionnelle si une version existe
+    request_headers = {}
+    if meta:
+        if meta.get('etag'):
+            request_headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            request_headers['If-Modified-Since'] = meta['last_modified']
+
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Récupération des parties depuis l'archive : {archive_url}")
+    response = download_archive(archive_url, limiter, request_headers,
+                                on_success=lambda r: write_cached_archive(context, archive_url, r))
+    if response is None:
+        return None
+    response.close()
+
+    if response.status_code == 304 and meta:
+        # Archive inchangée : la copie locale est à jour à cet instant
+        # (un mois terminé depuis devient ainsi définitif sans nouveau téléchargement)
+        write_archive_meta(meta_file, {**meta, 'fetched_at': time.time()})
+    if response.status_code in (200, 304):
+        # Archive téléchargée, ou inchangée : servir la copie locale
+        return archive_file
+    return None
+
+# Générateur qui télécharge toutes les archives en parallèle
+# Les fichiers sont renvoyés dans l'ordre des URLs pour garantir le même résultat qu'un parcours séquentiel
+# (None pour une archive qui n'a pas pu être récupérée), dès que chacun est disponible
+def download_archives(context, archive_urls):
+    if not archive_urls:
+        return
+
+    limiter = AdaptiveLimiter(ARCHIVE_INITIAL_CONCURRENCY, ARCHIVE_MIN_CONCURRENCY, ARCHIVE_MAX_CONCURRENCY)
+
+    def task(archive_url):
+        return load_archive(context, archive_url, limiter)
+
+    # Le pool est dimensionné au maximum, le limiteur décide du nombre de requêtes simultanées
+    with ThreadPoolExecutor(max_workers=ARCHIVE_MAX_CONCURRENCY) as executor:
+        try:
+            yield from executor.map(task, archive_urls)
+        finally:
+            # Si le consommateur s'arrête (annulation), ne pas lancer les téléchargements restants
+            executor.shutdown(cancel_futures=True)
+
+# Partie retenue pour l'utilisateur analysé
+UserGame = namedtuple('UserGame', [
+    'date_played', 'adversaire', 'adversaire_elo_initial', 'player_elo_initial',
+    'user_color', 'user_result', 'rated', 'end_time', 'url'
+])
+
+# Générateur qui retient les parties de l'utilisateur et les enrichit
+# (toutes dates confondues : la plage de dates est appliquée ensuite sur les colonnes, voir date_mask)
+# Produit des couples (mode de jeu, UserGame)
+def iter_user_games(context, archive_games):
+    username = context.username.lower()
+    for game in archive_games:
+        # Convertir le timestamp en objet datetime
+        date_played = datetime.fromtimestamp(game.end_time)
+
+        # Déterminer la couleur du joueur et l'adversaire
+        if game.white_username.lower() == username:
+            yield game.time_class, UserGame(
+                date_played, game.black_username, game.black_rating, game.white_rating,
+                'white', game.white_result, game.rated, game.end_time, game.url
+            )
+        elif game.black_username.lower() == username:
+            yield game.time_class, UserGame(
+                date_played, game.white_username, game.white_rating, game.black_rating,
+                'black', game.black_result, game.rated, game.end_time, game.url
             )
 
-        # Personnaliser le graphique
-        ax.set_xlabel('Joueurs')
-        ax.set_ylabel('Elo actuel')
-        ax.set_title('Elo actuel des adversaires')
-        ax.tick_params(axis='x', rotation=90)
-        plt.tight_layout()
-
-        # Ajuster les couleurs pour le mode nuit
-        if self.parent_app.is_dark_mode:
-            ax.set_facecolor('#2b2b2b')
-            self.figure.patch.set_facecolor('#2b2b2b')
-            ax.tick_params(axis='x', colors='white')
-            ax.tick_params(axis='y', colors='white')
-            ax.xaxis.label.set_color('white')
-            ax.yaxis.label.set_color('white')
-            ax.title.set_color('white')
+# Codes des résultats et des couleurs stockés dans le jeu de données
+RESULT_SYMBOLS = ['W', 'L', 'D', '?', '-']  # Victoire, défaite, nul, indéterminé, non applicable
+RESULT_CODES = {
+    'win': 0,
+    **{result: 1 for result in ['checkmated', 'timeout', 'resigned', 'lose']},
+    **{result: 2 for result in ['stalemate', 'agreed', 'repetition', 'timevsinsufficient', 'insufficient', '50move', 'draw']}
+}
+RESULT_UNKNOWN = 3
+COLOR_SYMBOLS = ['B', 'N', '-']  # Blancs, noirs, non applicable
+ELO_INCONNU = -1  # Valeur stockée quand l'Elo actuel de l'adversaire est inconnu
+
+# Colonnes du jeu de données des parties (un tableau structuré NumPy)
+GAME_DTYPE = np.dtype([
+    ('note_progression', 'f8'),
+    ('date_played', 'i8'),  # Timestamp de fin de partie
+    ('adversaire', 'i4'),  # Indice dans GameDataset.names (encodage par dictionnaire)
+    ('adversaire_elo_initial', 'i4'),
+    ('player_elo_initial', 'i4'),
+    ('progression', 'i4'),
+    ('adversaire_elo_actuel', 'i4'),
+    ('color', 'i1'),
+    ('result', 'i1'),
+    ('is_user', '?'),  # Ligne de synthèse de l'utilisateur
+    ('is_stale', '?')  # Elo actuel servi depuis une entrée expirée du cache, en cours de revalidation
+])
+
+# Historique de l'Elo de l'utilisateur, trié par date (un tableau structuré compact)
+ELO_HISTORY_DTYPE = np.dtype([
+    ('date_played', 'i8'),  # Timestamp de fin de partie
+    ('elo', 'i4')
+])
+
+# Fonction pour calculer le score de progression P sur des tableaux
+# P = log2(E_final / E_initial) * (12 / months) * (1 + 1 / N_parties), 0 si un Elo est nul
+def progression_scores(E_initial, E_final, N_parties, months):
+    E_initial = np.asarray(E_initial, dtype='f8')
+    E_final = np.asarray(E_final, dtype='f8')
+    valid = (E_initial != 0) & (E_final != 0)
+    ratio = np.divide(E_final, E_initial, out=np.ones_like(E_final), where=valid)
+    P = np.where(valid, np.log2(ratio) * (12 / months) * (1 + (1 / N_parties)), 0.0)
+    # Arrondir P à deux décimales
+    return np.round(P, 2)
+
+# Jeu de données en colonnes des parties d'un mode de jeu
+# La table et les graphiques lisent tous ce même jeu de données
+class GameDataset:
+    def __init__(self, records, names):
+        self.records = records  # Tableau structuré de type GAME_DTYPE
+        self.names = names  # Pseudos des adversaires, référencés par la colonne 'adversaire'
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, column):
+        return self.records[column]
+
+    # Pseudos des adversaires de chaque ligne
+    def adversaires(self):
+        return np.asarray(self.names, dtype=object)[self.records['adversaire']] if self.names else np.array([], dtype=object)
+
+    # Valeurs d'affichage d'une ligne (mêmes clés que les colonnes de la table)
+    def row(self, index):
+        record = self.records[index]
+        elo_actuel = int(record['adversaire_elo_actuel'])
+        return {
+            'note_progression': float(record['note_progression']),
+            'date_played': datetime.fromtimestamp(int(record['date_played'])),
+            'adversaire': self.names[record['adversaire']],
+            'adversaire_elo_initial': int(record['adversaire_elo_initial']),
+            'player_elo_initial': int(record['player_elo_initial']),
+            'progression': int(record['progression']),
+            'adversaire_elo_actuel': elo_actuel if elo_actuel != ELO_INCONNU else 'Inconnu',
+            'color_symbol': COLOR_SYMBOLS[record['color']],
+            'result_symbol': RESULT_SYMBOLS[record['result']]
+        }
+
+    # Nouveau jeu de données avec une ligne supplémentaire
+    def with_row(self, adversaire, **values):
+        record = np.zeros(1, dtype=GAME_DTYPE)
+        for column, value in values.items():
+            record[column] = value
+        record['adversaire'] = len(self.names)
+        return GameDataset(np.concatenate([self.records, record]), self.names + [adversaire])
+
+# Historique des parties traitées de l'utilisateur, en colonnes de largeur fixe
+# (une ligne par partie, hors parties contre lui-même, toutes dates confondues)
+HISTORY_DTYPE = np.dtype([
+    ('end_time', 'i8'),  # Timestamp de fin de partie
+    ('adversaire', 'i4'),  # Indice dans GameHistory.names (encodage par dictionnaire)
+    ('adversaire_elo_initial', 'i4'),  # ELO_INCONNU si l'API ne donne pas un entier
+    ('player_elo_initial', 'i4'),
+    ('color', 'i1'),
+    ('result', 'i1'),
+    ('rated', '?'),
+    ('mode', 'i1')  # Indice dans GameHistory.modes
+])
+
+# Fonction pour obtenir les valeurs distinctes d'une colonne, dans l'ordre de première apparition
+def first_seen(values):
+    codes, first = np.unique(values, return_index=True)
+    return codes[np.argsort(first)]
+
+# Parties retenues d'une analyse (tous modes confondus) et dictionnaires des pseudos et des modes
+# Les dictionnaires ne font que grandir : un indice désigne toujours le même pseudo (ou mode).
+class GameHistory:
+    def __init__(self, records, names, modes):
+        self.records = records  # Tableau structuré de type HISTORY_DTYPE
+        self.names = names  # Pseudos des adversaires, référencés par la colonne 'adversaire'
+        self.modes = modes  # Modes de jeu (time_class), référencés par la colonne 'mode'
+
+    @staticmethod
+    def empty():
+        return GameHistory(np.zeros(0, dtype=HISTORY_DTYPE), [], [])
+
+    def __len__(self):
+        return len(self.records)
+
+    # Modes présents, dans l'ordre de première apparition
+    def modes_present(self):
+        return [self.modes[code] for code in first_seen(self.records['mode'])]
+
+    # Adversaires uniques (pseudo en minuscules -> première orthographe rencontrée)
+    def adversaires(self):
+        adversaires = {}
+        for code in first_seen(self.records['adversaire']):
+            adversaires.setdefault(self.names[code].lower(), self.names[code])
+        return adversaires
+
+    # Lignes d'un mode de jeu, classées ou non (rated_filter None : toutes)
+    def mode_records(self, mode, rated_filter=None):
+        if mode not in self.modes:
+            return self.records[:0]
+        mask = self.records['mode'] == self.modes.index(mode)
+        if rated_filter is not None:
+            mask &= self.records['rated'] == rated_filter
+        return self.records[mask]
+
+# Historique des parties traitées enregistré sur disque (cache/history/<utilisateur>), mois par mois :
+# - games.bin : lignes HISTORY_DTYPE de largeur fixe, projetées en mémoire (np.memmap) à l'ouverture
+# - names.txt : pseudos des adversaires, un par ligne, dans l'ordre de leurs indices
+# - meta.json : nombres de lignes et de pseudos valides, modes de jeu, et emplacement et repère de chaque mois
+# Seuls les mois terminés (archives définitives) sont enregistrés : chaque nouveau mois est ajouté à la fin
+# des fichiers, sans réécrire les précédents. Les octets au-delà des nombres de meta.json (ajout interrompu)
+# sont ignorés, puis écrasés par l'ajout suivant. Un seul processus écrit : si un autre processus a modifié
+# l'historique depuis son ouverture, celui-ci n'y ajoute plus rien.
+class GameHistoryStore:
+    FORMAT_VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.games_file = os.path.join(path, 'games.bin')
+        self.names_file = os.path.join(path, 'names.txt')
+        self.meta_file = os.path.join(path, 'meta.json')
+        self.lock = threading.Lock()
+        self.writable = True
+        try:
+            self.load()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Historique illisible ({e}) : reconstruit depuis les archives")
+            self.reset()
+
+    def read_meta(self):
+        if not os.path.exists(self.meta_file):
+            return None
+        with open(self.meta_file, 'r') as f:
+            return json.load(f)
+
+    def load(self):
+        meta = self.read_meta()
+        if meta is None or meta.get('version') != self.FORMAT_VERSION or meta.get('dtype') != str(HISTORY_DTYPE.descr):
+            self.reset()
+            return
+        with open(self.names_file, 'rb') as f:
+            names = f.read(meta['names_bytes']).decode('utf-8').split('\n')[:-1]
+        if len(names) != meta['names']:
+            raise ValueError("pseudos manquants")
+        if os.path.getsize(self.games_file) < meta['count'] * HISTORY_DTYPE.itemsize:
+            raise ValueError("parties manquantes")
+        self.count = meta['count']
+        self.names_bytes = meta['names_bytes']
+        self.months = meta['months']
+        self.set_dictionaries(names, meta['modes'])
+        self.map_records()
+
+    # Historique vide (les fichiers existants seront remplacés au premier ajout)
+    def reset(self):
+        self.count = 0
+        self.names_bytes = 0
+        self.months = {}
+        self.set_dictionaries([], [])
+        self.map_records()
+
+    def set_dictionaries(self, names, modes):
+        self.names = names
+        self.name_index = {name: index for index, name in enumerate(names)}
+        self.saved_names = len(names)  # Pseudos déjà enregistrés dans names.txt
+        self.modes = modes
+        self.mode_index = {mode: index for index, mode in enumerate(modes)}
+
+    # Projection en mémoire des lignes enregistrées (aucune lecture avant l'accès aux données)
+    def map_records(self):
+        if self.count:
+            self.records = np.memmap(self.games_file, dtype=HISTORY_DTYPE, mode='r', shape=(self.count,))
         else:
-            ax.set_facecolor('white')
-            self.figure.patch.set_facecolor('white')
-            ax.tick_params(axis='x', colors='black')
-            ax.tick_params(axis='y', colors='black')
-            ax.xaxis.label.set_color('black')
-            ax.yaxis.label.set_color('black')
-            ax.title.set_color('black')
-
-        self.canvas.draw()
-
-    def update_graph(self):
-        self.plot_graph()
-
-# Classe pour le graphique de progression existant
-class ProgressionGraph(QWidget):
-    def __init__(self, data, parent_app):
-        super().__init__()
-        self.original_data = data  # Stocker les données originales sans les modifier
-        self.parent_app = parent_app  # Référence à l'application principale pour connaître le mode
-        self.show_user = True  # Par défaut, afficher la progression de l'utilisateur
-
-        self.init_ui()
-
-    def init_ui(self):
-        layout = QVBoxLayout()
-        self.setLayout(layout)
-
-        # Ajouter le graphique
-        self.figure = plt.figure()
-        self.canvas = FigureCanvas(self.figure)
-        layout.addWidget(self.canvas)
-
-        # Ajouter une case à cocher pour afficher/masquer la progression de l'utilisateur
-        self.checkbox = QCheckBox("Afficher ma progression")
-        self.checkbox.setChecked(True)
-        self.checkbox.stateChanged.connect(self.update_graph)
-        layout.addWidget(self.checkbox)
-
-        self.plot_graph()
-
-    def plot_graph(self):
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-
-        # Créer des copies locales des données pour éviter de modifier les données originales
-        data_copy = [item.copy() for item in self.original_data if item['adversaire'] != username]
-        adversaires = [item['adversaire'] for item in data_copy]
-        progressions = [item['adversaire_elo_actuel'] - item['adversaire_elo_initial'] for item in data_copy]
-
-        # Trier les données par progression croissante
-        data_pairs = list(zip(adversaires, progressions))
-        data_pairs.sort(key=lambda x: x[1])  # Tri par progression ascendante
-        adversaires_sorted, progressions_sorted = zip(*data_pairs) if data_pairs else ([], [])
-
-        # Convertir en listes pour pouvoir les modifier
-        adversaires_sorted = list(adversaires_sorted)
-        progressions_sorted = list(progressions_sorted)
-        colors = ['blue'] * len(adversaires_sorted)
-
-        # Afficher la progression de l'utilisateur si coché
-        if self.checkbox.isChecked():
-            # Récupérer les données de l'utilisateur
-            user_entry = next((item for item in self.original_data if item['adversaire'] == username), None)
-            if user_entry:
-                user_progression = user_entry['progression']
-                # Trouver la position pour insérer l'utilisateur
-                inserted = False
-                for i, prog in enumerate(progressions_sorted):
-                    if user_progression <= prog:
-                        adversaires_sorted.insert(i, username)
-                        progressions_sorted.insert(i, user_progression)
-                        colors.insert(i, 'gold')
-                        inserted = True
-                        user_index = i
-                        break
-                if not inserted:
-                    adversaires_sorted.append(username)
-                    progressions_sorted.append(user_progression)
-                    colors.append('gold')
-                    user_index = len(progressions_sorted) - 1
+            self.records = np.zeros(0, dtype=HISTORY_DTYPE)
+
+    # Indices d'un pseudo et d'un mode, ajoutés aux dictionnaires s'ils sont nouveaux
+    def name_id(self, name):
+        with self.lock:
+            index = self.name_index.get(name)
+            if index is None:
+                index = self.name_index[name] = len(self.names)
+                self.names.append(name)
+            return index
+
+    def mode_id(self, mode):
+        with self.lock:
+            index = self.mode_index.get(mode)
+            if index is None:
+                index = self.mode_index[mode] = len(self.modes)
+                self.modes.append(mode)
+            return index
+
+    # Lignes et repère d'un mois enregistré, None s'il ne l'est pas
+    def month(self, key):
+        month = self.months.get(key)
+        if month is None:
+            return None
+        records = self.records[month['offset']:month['offset'] + month['count']]
+        mark = HighWaterMark(month['end_time'], frozenset(month['urls'])) if month['count'] else None
+        return records, mark
+
+    # Écrire des octets à une position d'un fichier, sans le tronquer : games.bin est projeté en mémoire
+    # (par self.records et les analyses qui en gardent des tranches), et un fichier projeté ne peut pas
+    # être tronqué sous Windows. Les octets au-delà de la position enregistrée sont ignorés à la lecture.
+    @staticmethod
+    def write_at(path, offset, data):
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+            f.seek(offset)
+            f.write(data)
+
+    # Ajouter les lignes d'un mois terminé à la fin de l'historique
+    def append_month(self, key, records, mark):
+        with self.lock:
+            if not self.writable or key in self.months:
+                return
+            meta = self.read_meta() or {}
+            if meta.get('count', 0) != self.count or meta.get('names', 0) != self.saved_names:
+                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Historique modifié par un autre processus : plus d'ajout dans {self.path}")
+                self.writable = False
+                return
+            names = ''.join(name + '\n' for name in self.names[self.saved_names:]).encode('utf-8')
+            try:
+                self.write_at(self.games_file, self.count * HISTORY_DTYPE.itemsize, records.tobytes())
+                self.write_at(self.names_file, self.names_bytes, names)
+                self.months[key] = {
+                    'offset': self.count, 'count': len(records),
+                    'end_time': mark.end_time if mark else None, 'urls': sorted(mark.urls) if mark else []
+                }
+                self.count += len(records)
+                self.names_bytes += len(names)
+                self.saved_names = len(self.names)
+                tmp_path = self.meta_file + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump({
+                        'version': self.FORMAT_VERSION, 'dtype': str(HISTORY_DTYPE.descr),
+                        'count': self.count, 'names': self.saved_names, 'names_bytes': self.names_bytes,
+                        'modes': self.modes, 'months': self.months
+                    }, f)
+                os.replace(tmp_path, self.meta_file)
+            except OSError as e:
+                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Échec de l'écriture de l'historique : {e}")
+                self.writable = False
+                return
+            self.map_records()
+
+# Historiques ouverts par ce processus, un par utilisateur et par dossier de cache
+# (les analyses successives partagent ainsi les mêmes dictionnaires de pseudos et de modes)
+_history_stores = {}
+_history_stores_lock = threading.Lock()
+
+# Fonction pour obtenir l'historique enregistré de l'utilisateur d'un contexte, ouvert à la première utilisation
+def open_history_store(context):
+    path = context.history_cache_dir()
+    with _history_stores_lock:
+        if path not in _history_stores:
+            _history_stores[path] = GameHistoryStore(path)
+        return _history_stores[path]
+
+# Fonction pour oublier les historiques ouverts d'un dossier de cache (avant sa suppression)
+def close_history_stores(cache_dir):
+    root = os.path.join(cache_dir, HISTORY_CACHE_SUBDIR) + os.sep
+    with _history_stores_lock:
+        for path in [path for path in _history_stores if path.startswith(root)]:
+            del _history_stores[path]
+
+# Fonction pour convertir les parties d'une archive en lignes de l'historique (toutes dates confondues)
+# Renvoie les lignes et les URLs des parties (pour le repère des parties déjà analysées)
+def build_month_records(context, archive_file, store):
+    rows = []
+    urls = []
+    username = context.username.lower()
+    for mode, game in iter_user_games(context, iter_cached_archive(archive_file)):
+        if game.adversaire.lower() == username:
+            continue  # Partie contre soi-même
+        try:
+            adversaire_elo_initial = int(game.adversaire_elo_initial)
+        except (ValueError, TypeError):
+            # Partie conservée pour l'historique de l'Elo de l'utilisateur, mais pas pour la table
+            adversaire_elo_initial = ELO_INCONNU
+        rows.append((
+            game.end_time, store.name_id(game.adversaire), adversaire_elo_initial, game.player_elo_initial,
+            0 if game.user_color == 'white' else 1, RESULT_CODES.get(game.user_result, RESULT_UNKNOWN),
+            bool(game.rated), store.mode_id(mode)
+        ))
+        urls.append(game.url)
+    return np.array(rows, dtype=HISTORY_DTYPE), np.array(urls, dtype=object)
+
+# Fonction pour obtenir le masque des lignes comprises dans la plage de dates du contexte
+# (dates locales, comparées aux timestamps comme avec datetime.fromtimestamp)
+def date_mask(context, records):
+    mask = np.ones(len(records), dtype='?')
+    if context.start_date:
+        mask &= records['end_time'] >= context.start_date.timestamp()
+    if context.end_date:
+        mask &= records['end_time'] <= context.end_date.timestamp()
+    return mask
+
+# Fonction pour obtenir un mois de l'historique enregistré, None s'il faut relire son archive
+# Un mois dont la date de fin exclut les dernières parties est relu : son repère doit être celui
+# des parties retenues, avec leurs URL
+def stored_month(context, store, key):
+    month = store.month(key)
+    if month is None or month[1] is None or not context.end_date:
+        return month
+    return month if month[1].end_time <= context.end_date.timestamp() else None
+
+# Fonction pour calculer le jeu de données d'un mode de jeu à partir de ses parties
+# history_records : lignes HISTORY_DTYPE du mode (dans l'ordre des archives), names : dictionnaire des pseudos
+# ratings : classements des adversaires ; stale_names : adversaires dont le classement provient d'une entrée
+# expirée du cache
+def build_mode_result(history_records, names, ratings, mode_rating_type, stale_names=frozenset()):
+    # Adversaires uniques et leur Elo actuel (un adversaire pas encore résolu a un Elo actuel inconnu)
+    unique_adversaries = {}
+    for code in first_seen(history_records['adversaire']):
+        name = names[code].lower()
+        unique_adversaries.setdefault(name, ratings.get(name, {}).get(mode_rating_type))
+
+    # Seules les parties dont l'Elo initial de l'adversaire est connu figurent dans la table
+    kept = history_records[history_records['adversaire_elo_initial'] != ELO_INCONNU]
+    # Pseudos du jeu de données, dans l'ordre de première apparition
+    codes = first_seen(kept['adversaire'])
+    dataset_names = [names[code] for code in codes]
+    local_index = np.zeros(codes.max() + 1 if len(codes) else 0, dtype='i4')
+    local_index[codes] = np.arange(len(codes))
+
+    records = np.zeros(len(kept), dtype=GAME_DTYPE)
+    if len(kept):
+        records['date_played'] = kept['end_time']
+        records['adversaire'] = local_index[kept['adversaire']]
+        records['adversaire_elo_initial'] = kept['adversaire_elo_initial']
+        records['player_elo_initial'] = kept['player_elo_initial']
+        records['color'] = kept['color']
+        records['result'] = kept['result']
+
+        # Elo actuel de chaque pseudo, diffusé sur toutes ses parties
+        elo_by_name = np.array([
+            elo if elo is not None else ELO_INCONNU
+            for elo in (unique_adversaries[name.lower()] for name in dataset_names)
+        ], dtype='i4')
+        records['adversaire_elo_actuel'] = elo_by_name[records['adversaire']]
+        if stale_names:
+            stale_by_name = np.array([name.lower() in stale_names for name in dataset_names], dtype='?')
+            records['is_stale'] = stale_by_name[records['adversaire']]
+
+        # Progression et score P calculés en une seule opération vectorisée
+        known = records['adversaire_elo_actuel'] != ELO_INCONNU
+        E_initial = records['adversaire_elo_initial']
+        E_final = np.where(known, records['adversaire_elo_actuel'], E_initial)
+        records['progression'] = np.where(known, records['adversaire_elo_actuel'] - E_initial, 0)
+        # Chaque ligne représente une partie, et la progression est considérée sur 1 mois
+        records['note_progression'] = progression_scores(E_initial, E_final, N_parties=1, months=1)
+
+    # Historique compact de l'Elo du joueur (avant chaque partie), dans l'ordre chronologique
+    user_elo_history = np.zeros(len(history_records), dtype=ELO_HISTORY_DTYPE)
+    user_elo_history['date_played'] = history_records['end_time']
+    user_elo_history['elo'] = history_records['player_elo_initial']
+    user_elo_history = user_elo_history[np.argsort(user_elo_history['date_played'], kind='stable')]
+
+    return GameDataset(records, dataset_names), unique_adversaries, user_elo_history
+
+# Repère des parties déjà analysées : instant de fin de la partie la plus récente,
+# et URLs des parties terminées à cet instant (plusieurs parties peuvent finir la même seconde)
+HighWaterMark = namedtuple('HighWaterMark', ['end_time', 'urls'])
+
+# Fonction pour calculer le repère de lignes de l'historique (None si elles sont vides)
+# urls : URLs des parties, alignées sur les lignes
+def records_mark(records, urls):
+    if not len(records):
+        return None
+    end_time = int(records['end_time'].max())
+    return HighWaterMark(end_time, frozenset(urls[records['end_time'] == end_time]))
+
+# Fonction pour combiner deux repères (le plus récent l'emporte)
+def merge_marks(mark, other):
+    if mark is None or (other is not None and other.end_time > mark.end_time):
+        return other
+    if other is not None and other.end_time == mark.end_time:
+        return HighWaterMark(mark.end_time, mark.urls | other.urls)
+    return mark
+
+# Fonction pour obtenir le masque des lignes postérieures au repère
+def after_mark_mask(mark, records, urls):
+    end_times = records['end_time']
+    mask = end_times > mark.end_time
+    tied = np.flatnonzero(end_times == mark.end_time)
+    mask[tied] = [url not in mark.urls for url in urls[tied]]
+    return mask
+
+# Résultats de l'analyse de tous les modes de jeu, obtenus en une seule passe sur les archives
+# Les tableaux par mode (time_class) et par type de partie (classée ou non) sont calculés
+# à la demande puis mémorisés : changer de mode ne nécessite aucune requête.
+class MultiModeAnalysis:
+    def __init__(self, history, ratings, high_water_mark=None, stale_names=frozenset(), archive_files=None):
+        self.history = history  # Parties retenues de tous les modes (GameHistory)
+        self.ratings = ratings  # pseudo en minuscules -> {classement: elo}
+        self.high_water_mark = high_water_mark  # Repère pour le prochain rafraîchissement incrémental
+        self.stale_names = stale_names  # Adversaires servis depuis une entrée expirée du cache
+        # Archives de la plage de dates -> fichier en cache relu par la récupération (None si non relu),
+        # repris par fetch_openings ; None pour une analyse partielle ou initiale
+        self.archive_files = archive_files
+        self.results = {}
+
+    # Reprendre les résultats d'une analyse précédente pour les modes inchangés
+    # (aucune nouvelle partie et aucun adversaire dont le classement a changé)
+    def reuse_results(self, previous, new_modes, changed_names):
+        changed_codes = [code for code, name in enumerate(self.history.names) if name.lower() in changed_names]
+        for (mode, rated_filter), result in previous.results.items():
+            if mode in new_modes:
+                continue
+            if changed_codes and np.isin(self.history.mode_records(mode)['adversaire'], changed_codes).any():
+                continue
+            self.results[(mode, rated_filter)] = result
+
+    # Nouvelle analyse avec les classements revalidés de certains adversaires
+    # (les résultats des modes qui ne les concernent pas sont repris tels quels)
+    def with_ratings(self, updated):
+        stale_names = self.stale_names - set(updated)
+        analysis = MultiModeAnalysis(self.history, {**self.ratings, **updated}, self.high_water_mark, stale_names,
+                                     self.archive_files)
+        analysis.reuse_results(self, set(), set(updated))
+        return analysis
+
+    def modes(self):
+        return self.history.modes_present()
+
+    def get(self, mode, rated_filter):
+        key = (mode, rated_filter)
+        if key not in self.results:
+            self.results[key] = build_mode_result(self.history.mode_records(mode, rated_filter), self.history.names,
+                                                  self.ratings, f'chess_{mode}', self.stale_names)
+        return self.results[key]
+
+# Fonction pour obtenir la liste des archives de l'utilisateur qui chevauchent la plage de dates
+# Renvoie None si la liste n'a pas pu être récupérée
+def list_archives(context):
+    games_url = f'{API_BASE}/player/{context.username}/games/archives'
+    archives_response = http_client.get(games_url, 'archives')
+
+    if archives_response is None or archives_response.status_code != 200:
+        status = archives_response.status_code if archives_response is not None else 'erreur réseau'
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Échec de la requête : {status}")
+        return None
+
+    # Ne télécharger et ne lire que les mois qui chevauchent la plage de dates
+    all_archives = archives_response.json()['archives']
+    archives = select_archives(context, all_archives)
+    if len(archives) < len(all_archives):
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {len(archives)} archives sur {len(all_archives)} dans la plage de dates")
+    return archives
+
+# Fonction pour récupérer et analyser les parties de tous les modes de jeu
+# Rappels optionnels, appelés depuis le fil qui exécute la récupération :
+# - on_progress(étape, fait, total) pour suivre l'avancement
+# - on_partial(analyse) avec des résultats partiels, au plus toutes les PARTIAL_UPDATE_INTERVAL secondes
+# cancel_event (threading.Event) interrompt la récupération en levant FetchCancelled
+# ArchivesUnavailable est levée si la liste des archives n'a pas pu être récupérée
+# previous : analyse complète précédente (même contexte) pour un rafraîchissement incrémental :
+# seules les archives des mois de son repère et suivants sont relues, seules les parties postérieures
+# au repère sont ajoutées, et les résultats des modes inchangés sont repris tels quels.
+# serve_stale : servir immédiatement les classements expirés du cache (analysis.stale_names),
+# à revalider ensuite avec revalidate_analysis ; sinon ils sont récupérés à nouveau avant de répondre
+# Les mois terminés sont lus depuis l'historique enregistré (GameHistoryStore) quand il les contient ;
+# les autres sont lus depuis leur archive, puis ajoutés à l'historique s'ils sont terminés.
+def fetch_analysis(context, on_progress=None, on_partial=None, cancel_event=None, previous=None, serve_stale=False):
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Début de la récupération des données de {context.username}")
+    archives = list_archives(context)
+    if archives is None:
+        raise ArchivesUnavailable(f"archives de {context.username} indisponibles")
+    archive_files = dict.fromkeys(archives)  # Fichiers en cache des archives relues
+    store = open_history_store(context)
+    chunks = []  # Lignes retenues, archive par archive
+    adversaires_seen = {}  # Adversaires uniques (pseudo en minuscules -> pseudo)
+    ratings = {}  # Classements connus des adversaires
+    mark = None  # Repère de la partie la plus récente
+    new_modes = set()  # Modes qui ont reçu de nouvelles parties
+    rating_types = set()  # Classements à résoudre (modes présents)
+    new_games = 0
+    stale = set() if serve_stale else None  # Adversaires servis depuis une entrée expirée
+    last_partial = time.monotonic()
+
+    # L'analyse précédente doit partager les dictionnaires (pseudos, modes) de l'historique enregistré
+    incremental = previous is not None and previous.high_water_mark is not None and previous.history.names is store.names
+    if incremental:
+        # Partir des parties déjà analysées ; ne relire que les mois du repère et les suivants
+        mark = previous.high_water_mark
+        archives = [archive_url for archive_url in archives if archive_month_end(archive_url) > mark.end_time]
+        chunks.append(previous.history.records)
+        adversaires_seen.update(previous.history.adversaires())
+        rating_types.update(f'chess_{mode}' for mode in previous.history.modes_present())
+        ratings = dict(previous.ratings)
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Rafraîchissement incrémental : {len(archives)} archives à relire")
+
+    def current_history():
+        records = np.concatenate(chunks) if chunks else np.zeros(0, dtype=HISTORY_DTYPE)
+        return GameHistory(records, store.names, store.modes)
+
+    def emit_partial(force=False):
+        nonlocal last_partial
+        if on_partial is not None and (force or time.monotonic() - last_partial >= PARTIAL_UPDATE_INTERVAL):
+            last_partial = time.monotonic()
+            # Instantané : l'analyse partielle ne doit pas voir les ajouts suivants
+            on_partial(MultiModeAnalysis(current_history(), dict(ratings), stale_names=frozenset(stale or ())))
+
+    def on_archive(done, total):
+        if on_progress is not None:
+            on_progress('Archives', done, total)
+        if cancel_event is not None and cancel_event.is_set():
+            raise FetchCancelled()
+        # Servir immédiatement les classements déjà en cache pour les nouveaux adversaires
+        unknown = [adversaire for name, adversaire in adversaires_seen.items() if name not in ratings]
+        ratings.update(context.stats_cache.get_many(unknown, rating_types, stale))
+        emit_partial()
+
+    # Étape 1 : lire chaque mois depuis l'historique enregistré, ou sinon depuis son archive
+    # (cache ou API, téléchargées en parallèle), et retenir ses parties dans la plage de dates
+    to_parse = [archive_url for archive_url in archives
+                if incremental or stored_month(context, store, archive_month_key(archive_url)) is None]
+    if len(to_parse) < len(archives):
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {len(archives) - len(to_parse)} mois lus depuis l'historique enregistré")
+    with contextlib.closing(download_archives(context, to_parse)) as downloads:
+        for done, archive_url in enumerate(archives, start=1):
+            key = archive_month_key(archive_url)
+            month = None if incremental else stored_month(context, store, key)
+            if month is not None:
+                records, month_mark = month
+                urls = None
             else:
-                # Si l'utilisateur n'a pas de données, on n'affiche rien de plus
-                user_index = None
-        else:
-            user_index = None
-
-        # Créer un histogramme pour les adversaires
-        ax.bar(adversaires_sorted, progressions_sorted, color=colors)
-
-        # Ajouter une flèche pour indiquer la position de l'utilisateur
-        if user_index is not None:
-            ax.annotate(
-                'Vous êtes ici',
-                xy=(user_index, progressions_sorted[user_index]),
-                xytext=(user_index, max(progressions_sorted) * 1.05),
-                arrowprops=dict(facecolor='red', shrink=0.05, width=2, headwidth=8),
-                ha='center',
-                color='red',
-                fontsize=12
-            )
-
-        # Personnaliser le graphique
-        ax.set_xlabel('Joueurs')
-        ax.set_ylabel('Progression Elo')
-        ax.set_title('Progression des adversaires')
-        ax.tick_params(axis='x', rotation=90)
-        plt.tight_layout()
-
-        # Ajuster les couleurs pour le mode nuit
-        if self.parent_app.is_dark_mode:
-            ax.set_facecolor('#2b2b2b')
-            self.figure.patch.set_facecolor('#2b2b2b')
-            ax.tick_params(axis='x', colors='white')
-            ax.tick_params(axis='y', colors='white')
-            ax.xaxis.label.set_color('white')
-            ax.yaxis.label.set_color('white')
-            ax.title.set_color('white')
+                archive_file = archive_files[archive_url] = next(downloads)
+                if archive_file is None:
+                    records, urls = np.zeros(0, dtype=HISTORY_DTYPE), np.zeros(0, dtype=object)
+                else:
+                    records, urls = build_month_records(context, archive_file, store)
+                    if is_archive_final(context, archive_url):
+                        store.append_month(key, records, records_mark(records, urls))
+
+            mask = date_mask(context, records)
+            if incremental:
+                mask &= after_mark_mask(previous.high_water_mark, records, urls)  # Parties déjà analysées
+            kept = records[mask]  # Copie en mémoire des seules lignes retenues
+            # Repère du mois : un mois enregistré garde le sien (sa fin est retenue, ou aucune de ses parties)
+            if urls is not None:
+                mark = merge_marks(mark, records_mark(kept, urls[mask]))
+            elif len(kept):
+                mark = merge_marks(mark, month_mark)
+
+            if len(kept):
+                chunks.append(kept)
+                new_games += len(kept)
+                chunk_modes = [store.modes[code] for code in np.unique(kept['mode'])]
+                new_modes.update(chunk_modes)
+                rating_types.update(f'chess_{mode}' for mode in chunk_modes)
+                # Mémoriser les adversaires (première orthographe rencontrée)
+                for code in first_seen(kept['adversaire']):
+                    adversaires_seen.setdefault(store.names[code].lower(), store.names[code])
+            on_archive(done, len(archives))
+
+    emit_partial(force=True)
+    history = current_history()
+
+    # Étape 2 : résoudre les classements de tous les adversaires uniques en une seule fois
+    def on_rating(name, player_ratings):
+        ratings[name] = player_ratings
+        if on_progress is not None:
+            on_progress('Adversaires', len(ratings), len(adversaires_seen))
+        emit_partial()
+
+    ratings = resolve_player_ratings(
+        context, list(adversaires_seen.values()), rating_types,
+        on_result=on_rating, cancel_event=cancel_event, stale=stale
+    )
+
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Récupération des données de {context.username} terminée")
+    for endpoint, counters in http_client.stats().items():
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Requêtes {endpoint} : {counters['requests']}, "
+              f"nouvelles tentatives : {counters['retries']}, échecs : {counters['failures']}")
+    stale_names = frozenset(stale or ())
+    if stale_names:
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {len(stale_names)} classements expirés servis depuis le cache, à revalider")
+    analysis = MultiModeAnalysis(history, ratings, mark, stale_names, archive_files)
+    if incremental:
+        # Seuls les adversaires dont le classement (ou son état périmé) a changé invalident les résultats déjà calculés
+        changed_names = {name for name, player_ratings in ratings.items() if previous.ratings.get(name) != player_ratings}
+        changed_names |= stale_names ^ previous.stale_names
+        analysis.reuse_results(previous, new_modes, changed_names)
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {new_games} nouvelles parties, "
+              f"{len(changed_names)} classements d'adversaires modifiés")
+    return analysis
+
+# Fonction pour revalider en arrière-plan les classements expirés servis par fetch_analysis(serve_stale=True)
+# on_partial(analyse) reçoit les classements déjà revalidés, au plus toutes les REVALIDATION_UPDATE_INTERVAL
+# secondes ; cancel_event interrompt la revalidation en levant FetchCancelled (les classements déjà
+# récupérés restent enregistrés dans le cache). Renvoie l'analyse à jour.
+# En cas d'échec temporaire, un classement reste servi périmé.
+def revalidate_analysis(context, analysis, on_partial=None, cancel_event=None):
+    updated = {}
+    last_partial = time.monotonic()
+
+    def on_result(name, player_ratings):
+        nonlocal last_partial
+        if player_ratings is not None:
+            updated[name] = player_ratings
+        if on_partial is not None and updated and time.monotonic() - last_partial >= REVALIDATION_UPDATE_INTERVAL:
+            last_partial = time.monotonic()
+            on_partial(analysis.with_ratings(dict(updated)))
+
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Revalidation de {len(analysis.stale_names)} classements expirés")
+    failures = download_player_ratings(context, sorted(analysis.stale_names), on_result, cancel_event)
+    changed = sum(1 for name, player_ratings in updated.items() if analysis.ratings.get(name) != player_ratings)
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Revalidation terminée : {changed} classements modifiés, {failures} échecs")
+    return analysis.with_ratings(updated)
+
+# Fonction pour récupérer les données du mode de jeu d'un contexte (par défaut, la configuration en tête de fichier)
+def fetch_data(context=None):
+    context = context or default_context()
+    return fetch_analysis(context).get(context.game_mode, context.filter_rated)
+
+# Statistiques d'ouvertures : l'ouverture de chaque partie est lue dans son PGN (en-têtes ECO et ECOUrl,
+# sinon ses premiers coups). Les PGN sont analysés mois par mois dans un pool de processus, et le résultat
+# d'un mois terminé est enregistré (cache/openings/<utilisateur>/YYYY_MM.npz) : seuls les nouveaux mois
+# sont analysés.
+
+# Parties de l'utilisateur et leur ouverture (une ligne par partie, hors parties contre lui-même)
+OPENING_GAME_DTYPE = np.dtype([
+    ('end_time', 'i8'),  # Timestamp de fin de partie
+    ('opening', 'i4'),  # Indice dans la liste des ouvertures (encodage par dictionnaire)
+    ('adversaire_elo_initial', 'i4'),  # ELO_INCONNU si l'API ne donne pas un entier
+    ('color', 'i1'),
+    ('result', 'i1'),
+    ('rated', '?'),
+    ('mode', 'i1')  # Indice dans la liste des modes de jeu
+])
+OPENING_CACHE_VERSION = 1
+
+# Statistiques d'une ouverture jouée avec une couleur contre une tranche de classement
+OPENING_STATS_DTYPE = np.dtype([
+    ('opening', 'i4'),
+    ('color', 'i1'),
+    ('band', 'i4'),  # Elo de l'adversaire // OPENING_RATING_BAND, ou l'une des valeurs ci-dessous
+    ('games', 'i4'),
+    ('wins', 'i4'),
+    ('draws', 'i4'),
+    ('losses', 'i4')
+])
+OPENING_BAND_UNKNOWN = -1  # Elo de l'adversaire inconnu
+OPENING_ALL_BANDS = -2  # Toutes tranches confondues
+
+# Ouverture : code ECO (vide s'il est absent du PGN) et nom
+Opening = namedtuple('Opening', ['eco', 'name'])
+
+# Parties d'un mois et leurs dictionnaires d'ouvertures (Opening) et de modes de jeu
+OpeningMonth = namedtuple('OpeningMonth', ['games', 'openings', 'modes'])
+
+# En-têtes du PGN, puis éléments de la notation des coups : commentaires, variantes, annotations,
+# numéros de coups et résultat sont ignorés, seuls les coups sont capturés
+PGN_TAG_PATTERN = re.compile(r'^\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]\s*$', re.MULTILINE)
+PGN_MOVE_PATTERN = re.compile(r'\{[^}]*\}|\([^()]*\)|;[^\n]*|\$\d+|\d+\.+|1-0|0-1|1/2-1/2|\*|([^\s{}()\[\];]+)')
+
+# Fonction pour lire les en-têtes d'un PGN et ses premiers coups (au plus plies demi-coups)
+def parse_pgn(pgn, plies):
+    tags = {}
+    movetext_start = 0
+    for match in PGN_TAG_PATTERN.finditer(pgn):
+        tags[match.group(1)] = match.group(2)
+        movetext_start = match.end()
+    moves = []
+    if plies > 0:
+        for match in PGN_MOVE_PATTERN.finditer(pgn, movetext_start):
+            if match.group(1):
+                moves.append(match.group(1))
+                if len(moves) == plies:
+                    break
+    return tags, moves
+
+# Fonction pour obtenir le nom d'une ouverture à partir de son adresse chess.com
+# (.../openings/Sicilian-Defense-Open-2...d6-3.d4 -> Sicilian Defense Open : les coups sont retirés)
+def opening_name_from_url(eco_url):
+    if '/openings/' not in eco_url:
+        return ''
+    words = []
+    for word in unquote(eco_url.rstrip('/').rpartition('/openings/')[2]).split('-'):
+        if not word or word[0].isdigit():
+            break
+        words.append(word)
+    return ' '.join(words)
+
+# Fonction pour déterminer l'ouverture d'une partie (eco_url : champ 'eco' de l'API, si le PGN n'en a pas)
+def game_opening(pgn, eco_url=None):
+    tags, moves = parse_pgn(pgn, OPENING_FALLBACK_PLIES)
+    name = opening_name_from_url(tags.get('ECOUrl') or eco_url or '')
+    if not name:
+        # Sans nom d'ouverture : les premiers coups (1. e4 e5 2. Cf3 Cc6)
+        name = ' '.join(f'{i // 2 + 1}. {move}' if i % 2 == 0 else move for i, move in enumerate(moves)) or 'Inconnue'
+    return Opening(tags.get('ECO', ''), name)
+
+# Tâche du pool de processus : lire l'ouverture de chaque partie de l'utilisateur dans une archive en cache
+def parse_archive_openings(archive_file, username):
+    username = username.lower()
+    rows = []
+    openings = {}  # Opening -> indice
+    modes = {}  # Mode de jeu -> indice
+    for game in iter_raw_archive(archive_file):
+        white, black = game['white'], game['black']
+        if white['username'].lower() == username:
+            player, opponent, color = white, black, 0
+        elif black['username'].lower() == username:
+            player, opponent, color = black, white, 1
         else:
-            ax.set_facecolor('white')
-            self.figure.patch.set_facecolor('white')
-            ax.tick_params(axis='x', colors='black')
-            ax.tick_params(axis='y', colors='black')
-            ax.xaxis.label.set_color('black')
-            ax.yaxis.label.set_color('black')
-            ax.title.set_color('black')
-
-        self.canvas.draw()
-
-    def update_graph(self):
-        self.plot_graph()
-
-# Classe principale de l'application
-class ChessApp(QMainWindow):
-    def __init__(self, data, adversaries_elo, user_elo_history):
-        super().__init__()
-        self.setWindowTitle(f"Historique des parties {game_mode.upper()} de {username}")
-
-        # Créer des copies profondes des données pour éviter les modifications non souhaitées
-        self.data = [item.copy() for item in data]
-        self.adversaries_elo = adversaries_elo.copy()  # Dictionnaire des adversaires uniques et leur Elo actuel
-        self.user_elo_history = user_elo_history.copy()  # Liste des tuples (date, elo)
-        self.is_dark_mode = False  # Mode jour par défaut
-
-        # Récupérer les données de l'utilisateur et les ajouter à self.data
-        self.add_user_entry()
-
-        # Création du widget central et du layout principal
-        self.central_widget = QWidget()
-        self.setCentralWidget(self.central_widget)
-        self.main_layout = QVBoxLayout()
-        self.central_widget.setLayout(self.main_layout)
-
-        # Bouton de bascule du mode nuit/jour
-        self.toggle_button = QPushButton('🌞')  # Symbole du soleil pour le mode jour
-        self.toggle_button.setFixedSize(30, 30)
-        self.toggle_button.setStyleSheet('border: none; background-color: transparent; font-size: 20px;')
-        self.toggle_button.clicked.connect(self.toggle_dark_mode)
-        self.main_layout.addWidget(self.toggle_button, alignment=Qt.AlignRight)
-
-        # Création des onglets
-        self.tabs = QTabWidget()
-        self.main_layout.addWidget(self.tabs)
-
-        # Onglet principal avec la table
-        self.table_tab = QWidget()
-        self.tabs.addTab(self.table_tab, "Tableau")
-
-        # Onglet pour le graphique de progression
-        self.graph_tab = ProgressionGraph(self.data, self)
-        self.tabs.addTab(self.graph_tab, "Graphique progression")
-
-        # Onglet pour l'histogramme des Elos actuels
-        self.elo_histogram_tab = EloHistogram(self.adversaries_elo, self)
-        self.tabs.addTab(self.elo_histogram_tab, "Elo actuel adversaires")
-
-        # Configurer l'onglet de la table
-        self.setup_table_tab()
-
-        # Appliquer le style initial
-        self.apply_styles()
-
-    def add_user_entry(self):
-        # Trouver l'Elo le plus bas et la date correspondante
-        if self.user_elo_history:
-            self.user_elo_history.sort(key=lambda x: x[1])  # Trier par Elo ascendant
-            lowest_elo_date, lowest_elo = self.user_elo_history[0]
+            continue
+        if opponent['username'].lower() == username:
+            continue  # Partie contre soi-même
+        try:
+            adversaire_elo_initial = int(opponent['rating'])
+        except (ValueError, TypeError):
+            adversaire_elo_initial = ELO_INCONNU
+        opening = game_opening(game.get('pgn') or '', game.get('eco'))
+        rows.append((
+            game['end_time'], openings.setdefault(opening, len(openings)), adversaire_elo_initial, color,
+            RESULT_CODES.get(player.get('result', ''), RESULT_UNKNOWN), bool(game.get('rated', False)),
+            modes.setdefault(game['time_class'], len(modes))
+        ))
+    return OpeningMonth(np.array(rows, dtype=OPENING_GAME_DTYPE), list(openings), list(modes))
+
+# Fonctions pour enregistrer et relire l'index des ouvertures d'un mois (None s'il est absent ou illisible)
+def opening_cache_path(context, archive_url):
+    return os.path.join(context.opening_cache_dir(), archive_month_key(archive_url) + '.npz')
+
+def save_opening_month(path, month):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(
+            f, version=np.array(OPENING_CACHE_VERSION), games=month.games, modes=np.array(month.modes, dtype=str),
+            ecos=np.array([opening.eco for opening in month.openings], dtype=str),
+            names=np.array([opening.name for opening in month.openings], dtype=str)
+        )
+    os.replace(tmp_path, path)
+
+def load_opening_month(path):
+    try:
+        with np.load(path) as data:
+            if int(data['version']) != OPENING_CACHE_VERSION or data['games'].dtype != OPENING_GAME_DTYPE:
+                return None
+            openings = [Opening(eco, name) for eco, name in zip(data['ecos'].tolist(), data['names'].tolist())]
+            return OpeningMonth(data['games'], openings, data['modes'].tolist())
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+
+# Fonction pour obtenir le libellé d'une tranche de classement
+def rating_band_label(band):
+    if band == OPENING_ALL_BANDS:
+        return 'Toutes'
+    if band == OPENING_BAND_UNKNOWN:
+        return 'Inconnu'
+    low = band * OPENING_RATING_BAND
+    return f'{low}-{low + OPENING_RATING_BAND - 1}'
+
+# Index des ouvertures de toutes les parties retenues (tous modes confondus)
+class OpeningIndex:
+    def __init__(self, games, openings, modes):
+        self.games = games  # Tableau structuré de type OPENING_GAME_DTYPE
+        self.openings = openings  # Ouvertures (Opening), référencées par la colonne 'opening'
+        self.modes = modes  # Modes de jeu, référencés par la colonne 'mode'
+
+    @staticmethod
+    def empty():
+        return OpeningIndex(np.zeros(0, dtype=OPENING_GAME_DTYPE), [], [])
+
+    # Index de plusieurs mois : leurs dictionnaires sont fusionnés et leurs indices convertis
+    @staticmethod
+    def merge(months):
+        openings = {}
+        modes = {}
+        chunks = []
+        for month in months:
+            opening_codes = np.array([openings.setdefault(opening, len(openings)) for opening in month.openings], dtype='i4')
+            mode_codes = np.array([modes.setdefault(mode, len(modes)) for mode in month.modes], dtype='i1')
+            games = month.games.copy()
+            if len(games):
+                games['opening'] = opening_codes[games['opening']]
+                games['mode'] = mode_codes[games['mode']]
+            chunks.append(games)
+        games = np.concatenate(chunks) if chunks else np.zeros(0, dtype=OPENING_GAME_DTYPE)
+        return OpeningIndex(games, list(openings), list(modes))
+
+    def __len__(self):
+        return len(self.games)
+
+    # Statistiques par ouverture et par couleur, et par tranche de classement de l'adversaire si by_band,
+    # des parties d'un mode de jeu (rated_filter None : classées ou non), les ouvertures les plus jouées d'abord
+    def table(self, mode, rated_filter=None, by_band=True):
+        if mode not in self.modes:
+            return np.zeros(0, dtype=OPENING_STATS_DTYPE)
+        mask = self.games['mode'] == self.modes.index(mode)
+        if rated_filter is not None:
+            mask &= self.games['rated'] == rated_filter
+        games = self.games[mask]
+
+        keys = np.zeros(len(games), dtype=[('opening', 'i4'), ('color', 'i1'), ('band', 'i4')])
+        keys['opening'] = games['opening']
+        keys['color'] = games['color']
+        if by_band:
+            elo = games['adversaire_elo_initial']
+            keys['band'] = np.where(elo == ELO_INCONNU, OPENING_BAND_UNKNOWN, elo // OPENING_RATING_BAND)
         else:
-            lowest_elo = None
-            lowest_elo_date = None
-
-        # Récupérer l'Elo actuel de l'utilisateur
-        user_stats_url = f'https://api.chess.com/pub/player/{username}/stats'
-        user_stats_response = requests.get(user_stats_url, headers=headers)
-        if user_stats_response.status_code == 200:
-            user_stats = user_stats_response.json()
-            user_elo_actuel = user_stats.get(rating_type, {}).get('last', {}).get('rating', None)
+            keys['band'] = OPENING_ALL_BANDS
+        groups, inverse = np.unique(keys, return_inverse=True)
+
+        stats = np.zeros(len(groups), dtype=OPENING_STATS_DTYPE)
+        for column in ('opening', 'color', 'band'):
+            stats[column] = groups[column]
+        stats['games'] = np.bincount(inverse, minlength=len(groups))
+        for column, symbol in (('wins', 'W'), ('draws', 'D'), ('losses', 'L')):
+            stats[column] = np.bincount(inverse[games['result'] == RESULT_SYMBOLS.index(symbol)], minlength=len(groups))
+        return stats[np.argsort(-stats['games'], kind='stable')]
+
+# Fonction pour construire l'index des ouvertures des parties du contexte (plage de dates comprise)
+# Les mois déjà indexés sont relus depuis le cache ; les autres archives sont téléchargées si nécessaire
+# puis analysées en parallèle dans des processus séparés, au fil des téléchargements.
+# on_progress(étape, fait, total) suit l'avancement ; cancel_event interrompt l'analyse en levant FetchCancelled
+# (les mois déjà analysés restent enregistrés).
+# archive_files : archives d'une récupération qui vient de se terminer (MultiModeAnalysis.archive_files) ;
+# la liste des archives n'est alors pas redemandée, et les fichiers déjà relus ne sont pas téléchargés à nouveau.
+def fetch_openings(context, on_progress=None, cancel_event=None, archive_files=None):
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Analyse des ouvertures de {context.username}")
+    if archive_files is None:
+        archives = list_archives(context)
+        if archives is None:
+            return OpeningIndex.empty()
+        archive_files = {}
+    else:
+        archives = list(archive_files)
+
+    months = {}  # URL de l'archive -> OpeningMonth
+    for archive_url in archives:
+        month = load_opening_month(opening_cache_path(context, archive_url))
+        if month is not None:
+            months[archive_url] = month
+    to_parse = [archive_url for archive_url in archives if archive_url not in months]
+    to_download = [archive_url for archive_url in to_parse if archive_files.get(archive_url) is None]
+
+    # Fichiers des archives à analyser, dans l'ordre de to_parse : ceux de la récupération, sinon téléchargés
+    def parse_files(downloads):
+        for archive_url in to_parse:
+            archive_file = archive_files.get(archive_url)
+            yield archive_file if archive_file is not None else next(downloads)
+
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise FetchCancelled()
+
+    def on_parsed(archive_url, month):
+        if month is None:
+            # Archive indisponible ou illisible : mois vide, analysé de nouveau la prochaine fois
+            month = OpeningMonth(np.zeros(0, dtype=OPENING_GAME_DTYPE), [], [])
+        elif is_archive_final(context, archive_url):
+            save_opening_month(opening_cache_path(context, archive_url), month)
+        months[archive_url] = month
+        if on_progress is not None:
+            on_progress('Ouvertures', len(months), len(archives))
+        check_cancelled()
+
+    def parse(archive_url, task, *args):
+        try:
+            return task(*args)
+        except Exception as e:
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Échec de l'analyse des PGN de {archive_url} : {e}")
+            return None
+
+    workers = min(OPENING_MAX_WORKERS, len(to_parse))
+    with contextlib.closing(download_archives(context, to_download)) as downloads:
+        if workers <= 1:
+            # Un seul mois (en général le mois en cours) ou un seul processeur : pas de processus à démarrer
+            for archive_url, archive_file in zip(to_parse, parse_files(downloads)):
+                check_cancelled()
+                on_parsed(archive_url, parse(archive_url, parse_archive_openings, archive_file, context.username)
+                          if archive_file is not None else None)
         else:
-            user_elo_actuel = None
-
-        if lowest_elo is not None and user_elo_actuel is not None:
-            user_progression = user_elo_actuel - lowest_elo
+            # Processus démarrés à neuf (spawn), comme pour le traitement par lots
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                try:
+                    futures = {}
+                    for archive_url, archive_file in zip(to_parse, parse_files(downloads)):
+                        check_cancelled()
+                        if archive_file is None:
+                            on_parsed(archive_url, None)
+                        else:
+                            futures[executor.submit(parse_archive_openings, archive_file, context.username)] = archive_url
+                    for future in as_completed(futures):
+                        on_parsed(futures[future], parse(futures[future], future.result))
+                finally:
+                    # Annulation : ne pas lancer l'analyse des mois restants
+                    executor.shutdown(cancel_futures=True)
+
+    # Parties de la plage de dates, dans l'ordre des archives
+    index = OpeningIndex.merge(
+        months[archive_url]._replace(games=months[archive_url].games[date_mask(context, months[archive_url].games)])
+        for archive_url in archives
+    )
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Ouvertures de {context.username} : {len(index)} parties, "
+          f"{len(index.openings)} ouvertures ({len(to_parse)} mois analysés)")
+    return index
+
+# Progression de l'utilisateur depuis son Elo le plus bas, ajoutée à la table et au résumé
+UserProgression = namedtuple('UserProgression', [
+    'lowest_elo_date', 'lowest_elo', 'elo_actuel', 'progression', 'note_progression'
+])
+
+# Fonction pour calculer la progression de l'utilisateur à partir de l'historique de son Elo
+# Renvoie None s'il n'y a aucune partie ou si l'Elo actuel de l'utilisateur est inconnu
+def user_progression(context, user_elo_history, mode_rating_type, N_parties):
+    # Trouver l'Elo le plus bas et la date correspondante
+    # (sans trier l'historique, qui doit rester dans l'ordre chronologique)
+    if not len(user_elo_history):
+        return None
+    lowest = user_elo_history[np.argmin(user_elo_history['elo'])]
+    lowest_elo_date, lowest_elo = int(lowest['date_played']), int(lowest['elo'])
+
+    # Elo actuel de l'utilisateur mémorisé par le service de classements, sans requête
+    # (récupéré au préalable par la récupération des données ou l'export)
+    user_elo_actuel = rating_service.cached_rating(context.username, mode_rating_type)
+    if user_elo_actuel is None:
+        return None
+
+    # Calcul du score de progression P pour l'utilisateur
+    N_parties = N_parties if N_parties > 0 else 1  # Éviter la division par zéro
+    months = 1  # Ajustez si nécessaire
+    P = progression_scores([lowest_elo], [user_elo_actuel], N_parties, months)[0]
+    return UserProgression(lowest_elo_date, lowest_elo, user_elo_actuel, user_elo_actuel - lowest_elo, float(P))
+
+# Colonnes de la table : (colonne du jeu de données, titre)
+TABLE_COLUMNS = [
+    ('note_progression', 'Note de progression'),
+    ('date_played', 'Date'),
+    ('adversaire', 'Adversaire'),
+    ('adversaire_elo_initial', 'Elo initial adv.'),
+    ('player_elo_initial', 'Mon Elo initial'),
+    ('progression', 'Progression'),
+    ('adversaire_elo_actuel', 'Elo actuel adv.'),
+    ('color_symbol', 'Couleur'),
+    ('result_symbol', 'Résultat')
+]
+
+# Formats d'export des parties, reconnus aussi à l'extension du fichier de sortie
+EXPORT_FORMATS = {
+    'csv': '.csv',
+    'jsonl': '.jsonl',
+    'parquet': '.parquet'
+}
 
-            # Calcul du score de progression P pour l'utilisateur
-            E_initial = lowest_elo
-            E_final = user_elo_actuel
-            N_parties = len(self.data) if len(self.data) > 0 else 1  # Éviter la division par zéro
-            months = 1  # Ajustez si nécessaire
+# Fonction pour convertir le jeu de données en colonnes exportables (mêmes clés que la table)
+# Les dates sont au format ISO et un Elo actuel inconnu est exporté comme valeur vide
+def export_columns(dataset):
+    records = dataset.records
+    return {
+        'note_progression': records['note_progression'].tolist(),
+        'date_played': [datetime.fromtimestamp(timestamp).isoformat() for timestamp in records['date_played'].tolist()],
+        'adversaire': dataset.adversaires().tolist(),
+        'adversaire_elo_initial': records['adversaire_elo_initial'].tolist(),
+        'player_elo_initial': records['player_elo_initial'].tolist(),
+        'progression': records['progression'].tolist(),
+        'adversaire_elo_actuel': [None if elo == ELO_INCONNU else elo for elo in records['adversaire_elo_actuel'].tolist()],
+        'color_symbol': [COLOR_SYMBOLS[color] for color in records['color'].tolist()],
+        'result_symbol': [RESULT_SYMBOLS[result] for result in records['result'].tolist()]
+    }
 
-            if E_initial == 0 or E_final == 0:
-                P = 0
-            else:
-                P = (math.log2(E_final / E_initial)) * (12 / months) * (1 + (1 / N_parties))
-            P = round(P, 2)
-
-            user_entry = {
-                'note_progression': P,
-                'date_played': lowest_elo_date,
-                'adversaire': username,
-                'adversaire_elo_initial': user_elo_actuel,
-                'player_elo_initial': lowest_elo,
-                'progression': user_progression,
-                'adversaire_elo_actuel': user_elo_actuel,
-                'color_symbol': '-',  # Non applicable
-                'result_symbol': '-'  # Non applicable
-            }
-
-            # Ajouter l'entrée de l'utilisateur aux données
-            self.data.append(user_entry)
-
-    def toggle_dark_mode(self):
-        self.is_dark_mode = not self.is_dark_mode
-        if self.is_dark_mode:
-            self.toggle_button.setText('🌜')  # Symbole de la lune pour le mode nuit
-        else:
-            self.toggle_button.setText('🌞')  # Symbole du soleil pour le mode jour
-        self.apply_styles()
-        self.graph_tab.update_graph()  # Mettre à jour le graphique pour le mode nuit/jour
-        self.elo_histogram_tab.update_graph()  # Mettre à jour le nouvel histogramme
-
-    def setup_table_tab(self):
-        layout = QVBoxLayout()
-        self.table_tab.setLayout(layout)
-
-        # Création du tableau
-        self.table = QTableWidget()
-        layout.addWidget(self.table)
-
-        # Bouton pour rafraîchir les données
-        self.refresh_button = QPushButton("Rafraîchir les données")
-        self.refresh_button.clicked.connect(self.refresh_data)
-        layout.addWidget(self.refresh_button)
-
-        # Définition des colonnes
-        self.columns = [
-            ('note_progression', 'Note de progression'),
-            ('date_played', 'Date'),
-            ('adversaire', 'Adversaire'),
-            ('adversaire_elo_initial', 'Elo initial adv.'),
-            ('player_elo_initial', 'Mon Elo initial'),
-            ('progression', 'Progression'),
-            ('adversaire_elo_actuel', 'Elo actuel adv.'),
-            ('color_symbol', 'Couleur'),
-            ('result_symbol', 'Résultat')
-        ]
-
-        self.setup_table()
-        self.load_data()
-        self.table.resizeColumnsToContents()
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table.setSortingEnabled(True)
-
-    def setup_table(self):
-        self.table.setColumnCount(len(self.columns))
-        self.table.setHorizontalHeaderLabels([col[1] for col in self.columns])
-
-    def load_data(self):
-        self.table.setRowCount(len(self.data))
-
-        for row_idx, item in enumerate(self.data):
-            for col_idx, (key, _) in enumerate(self.columns):
-                value = item[key]
-
-                # Formatage spécifique
-                if key == 'date_played':
-                    cell = DateTableWidgetItem(value)
-                elif key in ['progression', 'note_progression', 'adversaire_elo_initial', 'player_elo_initial', 'adversaire_elo_actuel']:
-                    cell = NumericTableWidgetItem(value)
-                else:
-                    display_value = str(value)
-                    cell = QTableWidgetItem(display_value)
-
-                # Alignement centré
-                cell.setTextAlignment(Qt.AlignCenter)
-
-                # Coloration des cellules
-                if key == 'progression':
-                    progression_value = value
-                    if progression_value > 0:
-                        color = QColor('green')
-                        display_value = f"+{progression_value}"
-                    elif progression_value < 0:
-                        color = QColor('red')
-                        display_value = f"{progression_value}"
-                    else:
-                        color = QColor('black')
-                        display_value = f"{progression_value}"
-                    cell.setForeground(QBrush(color))
-                    cell.setText(display_value)
-
-                if key == 'note_progression':
-                    P = value
-                    if P < 1:
-                        color = QColor('#FF8080')  # Rouge clair
-                    elif 1 <= P < 2:
-                        color = QColor('#FFC080')  # Orange clair
-                    elif 2 <= P < 3:
-                        color = QColor('#FFFF80')  # Jaune
-                    elif 3 <= P < 5:
-                        color = QColor('#80FF80')  # Vert clair
-                    else:
-                        color = QColor('#FF80FF')  # Mauve
-                    cell.setForeground(QBrush(color))
-
-                # **Nouvelle section pour colorer le fond de 'result_symbol'**
-                if key == 'result_symbol':
-                    result_value = value
-                    if result_value == 'W':
-                        background_color = QColor('green')
-                    elif result_value == 'L':
-                        background_color = QColor('red')
-                    elif result_value == 'D':
-                        background_color = QColor('gray')
-                    else:
-                        background_color = QColor('white')
-                    cell.setBackground(QBrush(background_color))
-                    # Facultatif : Changer la couleur du texte pour une meilleure lisibilité
-                    cell.setForeground(QBrush(QColor('white')))
-
-                # Ajuster les couleurs pour le mode nuit
-                if self.is_dark_mode:
-                    if key not in ['progression', 'note_progression', 'result_symbol']:
-                        cell.setForeground(QBrush(QColor('#dcdcdc')))  # Texte clair sur fond sombre
-
-                self.table.setItem(row_idx, col_idx, cell)
-
-            # Mettre en évidence la ligne de l'utilisateur
-            if item['adversaire'].lower() == username.lower():
-                for col_idx in range(self.table.columnCount()):
-                    self.table.item(row_idx, col_idx).setBackground(QBrush(QColor('gold')))
-
-
-    def refresh_data(self):
-        # Recharger les données
-        data, adversaries_elo, user_elo_history = fetch_data()
-        self.data = [item.copy() for item in data]
-        self.adversaries_elo = adversaries_elo.copy()
-        self.user_elo_history = user_elo_history.copy()
-        self.add_user_entry()
-        self.load_data()
-        self.graph_tab.original_data = self.data
-        self.graph_tab.update_graph()
-        self.elo_histogram_tab.adversaries_elo_original = self.adversaries_elo
-        self.elo_histogram_tab.update_graph()
-
-    def apply_styles(self):
-        if self.is_dark_mode:
-            style = """
-            QMainWindow {
-                background-color: #2b2b2b;
-            }
-            QTableWidget {
-                background-color: #3c3f41;
-                color: #dcdcdc;
-                gridline-color: #4d4d4d;
-            }
-            QHeaderView::section {
-                background-color: #3c3f41;
-                color: #dcdcdc;
-                padding: 4px;
-                border: 1px solid #4d4d4d;
-            }
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                text-align: center;
-                font-size: 14px;
-                margin: 4px 2px;
-                border-radius: 4px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-            QTabWidget::pane {
-                border-top: 2px solid #C2C7CB;
-            }
-            QTabBar::tab {
-                background: #3c3f41;
-                color: #dcdcdc;
-                border: 1px solid #4d4d4d;
-                padding: 10px;
-            }
-            QTabBar::tab:selected {
-                background: #4d4d4d;
-                border-bottom-color: #4d4d4d;
-            }
-            """
+# Fonction pour écrire les parties dans un fichier (CSV, JSON Lines ou Parquet)
+def export_games(dataset, output_path, export_format):
+    columns = export_columns(dataset)
+    names = [column for column, _ in TABLE_COLUMNS]
+
+    if export_format == 'parquet':
+        # Dépendance optionnelle, importée uniquement pour cet export
+        import pyarrow
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(pyarrow.table({name: columns[name] for name in names}), output_path)
+        return
+
+    rows = zip(*(columns[name] for name in names))
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        if export_format == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(names)
+            writer.writerows(rows)
         else:
-            style = """
-            QMainWindow {
-                background-color: #f5f5f5;
-            }
-            QTableWidget {
-                background-color: white;
-                color: black;
-                gridline-color: #dcdcdc;
-            }
-            QHeaderView::section {
-                background-color: #f0f0f0;
-                color: black;
-                padding: 4px;
-                border: 1px solid #dcdcdc;
-            }
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                text-align: center;
-                font-size: 14px;
-                margin: 4px 2px;
-                border-radius: 4px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-            QTabWidget::pane {
-                border-top: 2px solid #C2C7CB;
-            }
-            QTabBar::tab {
-                background: #e0e0e0;
-                color: black;
-                border: 1px solid #C4C4C3;
-                padding: 10px;
-            }
-            QTabBar::tab:selected {
-                background: #f0f0f0;
-                border-bottom-color: #f0f0f0;
-            }
-            """
-        self.setStyleSheet(style)
-        self.load_data()  # Recharger les données pour appliquer les couleurs correctes dans la table
+            for row in rows:
+                f.write(json.dumps(dict(zip(names, row)), ensure_ascii=False) + '\n')
+
+# Fonction pour calculer les statistiques de synthèse d'un mode de jeu
+def summarize(context, dataset, unique_adversaries, user_elo_history):
+    records = dataset.records
+    results = records['result']
+    known = records['adversaire_elo_actuel'] != ELO_INCONNU
+    progression = user_progression(context, user_elo_history, context.rating_type, len(dataset))
+
+    def iso_date(timestamp):
+        return datetime.fromtimestamp(int(timestamp)).isoformat()
+
+    return {
+        'username': context.username,
+        'game_mode': context.game_mode,
+        'filter_rated': context.filter_rated,
+        'parties': len(dataset),
+        'victoires': int(np.count_nonzero(results == RESULT_SYMBOLS.index('W'))),
+        'defaites': int(np.count_nonzero(results == RESULT_SYMBOLS.index('L'))),
+        'nulles': int(np.count_nonzero(results == RESULT_SYMBOLS.index('D'))),
+        'adversaires_uniques': len(unique_adversaries),
+        'adversaires_elo_inconnu': sum(1 for elo in unique_adversaries.values() if elo is None),
+        'premiere_partie': iso_date(records['date_played'].min()) if len(dataset) else None,
+        'derniere_partie': iso_date(records['date_played'].max()) if len(dataset) else None,
+        'note_progression_moyenne': round(float(records['note_progression'][known].mean()), 2) if known.any() else None,
+        'progression_moyenne_adversaires': round(float(records['progression'][known].mean()), 1) if known.any() else None,
+        'elo_min': int(user_elo_history['elo'].min()) if len(user_elo_history) else None,
+        'elo_max': int(user_elo_history['elo'].max()) if len(user_elo_history) else None,
+        'elo_actuel': progression.elo_actuel if progression is not None else None,
+        'progression': progression.progression if progression is not None else None,
+        'note_progression': progression.note_progression if progression is not None else None
+    }
 
-# Fonction principale
-def main():
-    data, adversaries_elo, user_elo_history = fetch_data()
+# Fonctions pour nommer les fichiers d'export d'un contexte
+def export_file_name(context, export_format):
+    return f'{context.username}_{context.game_mode}{EXPORT_FORMATS[export_format]}'
+
+def summary_file_path(output_path):
+    return f'{os.path.splitext(output_path)[0]}.summary.json'
+
+# Fonction pour vérifier que l'export demandé est possible avant de lancer la récupération
+def check_export_format(export_format):
+    if export_format == 'parquet':
+        try:
+            import pyarrow
+        except ImportError:
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] L'export Parquet nécessite pyarrow (pip install pyarrow)")
+            return False
+    return True
+
+# Fonction pour analyser un joueur puis écrire ses parties et ses statistiques de synthèse
+# Renvoie les statistiques de synthèse
+def export_analysis(context, output_path, export_format, summary_path):
+    # Classements de l'utilisateur pour la ligne de synthèse
+    rating_service.get_ratings(context.username)
+    analysis = fetch_analysis(context)
+    dataset, unique_adversaries, user_elo_history = analysis.get(context.game_mode, context.filter_rated)
+
+    export_games(dataset, output_path, export_format)
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {len(dataset)} parties exportées dans {output_path}")
+
+    summary = summarize(context, dataset, unique_adversaries, user_elo_history)
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Statistiques de synthèse écrites dans {summary_path}")
+    return summary
+
+# Fonction pour exécuter l'analyse sans interface : export des parties et des statistiques
+# Renvoie le code de sortie du programme
+def run_headless(context, output_path, export_format, summary_path):
+    if not check_export_format(export_format):
+        return 1
+    try:
+        export_analysis(context, output_path, export_format, summary_path)
+    except ArchivesUnavailable as e:
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Échec de l'analyse : {e}")
+        return 1
+    return 0
+
+# Fonction exécutée au démarrage de chaque processus du traitement par lots
+# snapshot_path : instantané relu par le processus (les réponses ne sont pas partagées entre processus)
+def init_batch_worker(budget, snapshot_path=None):
+    global request_budget, http_snapshot
+    request_budget = budget
+    if snapshot_path is not None:
+        http_snapshot = HttpSnapshot(snapshot_path, 'replay')
+
+# Tâche du traitement par lots : analyser un joueur
+# Une erreur est renvoyée dans les statistiques du joueur, pour ne pas interrompre les autres
+def batch_task(context, output_dir, export_format):
+    output_path = os.path.join(output_dir, export_file_name(context, export_format))
+    try:
+        return export_analysis(context, output_path, export_format, summary_file_path(output_path))
+    except Exception as e:
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Échec de l'analyse de {context.username} : {e}")
+        return {'username': context.username, 'game_mode': context.game_mode, 'erreur': str(e)}
+
+# Fonction pour analyser plusieurs joueurs en parallèle dans des processus séparés
+# Les processus partagent la base des classements (SQLite en mode WAL) et un budget global de requêtes
+# par seconde ; les statistiques de tous les joueurs sont regroupées dans <dossier>/summary.jsonl.
+# Renvoie le code de sortie du programme
+def run_batch(contexts, output_dir, export_format, workers=BATCH_MAX_WORKERS, rate=BATCH_REQUEST_RATE, snapshot_path=None):
+    if not check_export_format(export_format):
+        return 1
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    # Ouvrir les caches ici une première fois : la migration et la purge ne sont faites qu'une fois
+    for cache_dir in {context.cache_dir for context in contexts}:
+        open_stats_cache(cache_dir)
+
+    # Processus démarrés à neuf (spawn) : aucune connexion SQLite n'est héritée de ce processus
+    mp_context = multiprocessing.get_context('spawn')
+    budget = RequestBudget(rate, mp_context) if rate > 0 else None
+
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Analyse de {len(contexts)} joueurs ({workers} processus)")
+    summaries = [None] * len(contexts)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context,
+                             initializer=init_batch_worker, initargs=(budget, snapshot_path)) as executor:
+        futures = {executor.submit(batch_task, context, output_dir, export_format): i
+                   for i, context in enumerate(contexts)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            summaries[futures[future]] = future.result()
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Joueurs analysés : {done} / {len(contexts)}")
+
+    summary_path = os.path.join(output_dir, 'summary.jsonl')
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        for summary in summaries:
+            f.write(json.dumps(summary, ensure_ascii=False) + '\n')
+    failures = sum(1 for summary in summaries if 'erreur' in summary)
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Statistiques de synthèse écrites dans {summary_path} ({failures} échecs)")
+    return 1 if failures else 0
+
+# Fonction pour lire la liste des joueurs d'un traitement par lots (un pseudo par ligne, # pour les commentaires)
+def read_batch_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        names = [line.split('#')[0].strip() for line in f]
+    # Les pseudos chess.com ne distinguent pas les majuscules : un joueur n'est analysé qu'une fois
+    players = {}
+    for name in names:
+        if name:
+            players.setdefault(name.lower(), name)
+    return list(players.values())
+
+# Valeurs acceptées par l'option --rated
+RATED_CHOICES = [
+    ('oui', True),
+    ('non', False),
+    ('toutes', None)
+]
+
+# Fonction pour lire les options de la ligne de commande
+# Les options non reconnues sont laissées à Qt
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Suivi de la progression des adversaires sur chess.com")
+    parser.add_argument('--headless', action='store_true',
+                        help="exporter les parties et les statistiques sans ouvrir l'interface (ni importer Qt et matplotlib)")
+    parser.add_argument('--batch', metavar='FICHIER',
+                        help="analyser sans interface tous les joueurs du fichier (un pseudo par ligne)")
+    parser.add_argument('--user', help=f"pseudo chess.com (défaut : {username})")
+    parser.add_argument('--mode', help=f"mode de jeu (défaut : {game_mode})")
+    parser.add_argument('--rated', choices=[choice for choice, _ in RATED_CHOICES],
+                        help="parties classées, non classées ou toutes")
+    parser.add_argument('--start', help="date de début (dd/mm/yyyy)")
+    parser.add_argument('--end', help="date de fin (dd/mm/yyyy)")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help=f"dossier de cache (défaut : {CACHE_DIR})")
+    parser.add_argument('--output', '-o', help="fichier des parties (défaut : <pseudo>_<mode>.<format>)")
+    parser.add_argument('--output-dir', default='export', help="dossier des exports du traitement par lots (défaut : export)")
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS),
+                        help="format d'export (défaut : déduit de l'extension de --output, sinon csv)")
+    parser.add_argument('--summary', help="fichier JSON des statistiques (défaut : <sortie>.summary.json)")
+    parser.add_argument('--workers', type=int, default=BATCH_MAX_WORKERS,
+                        help=f"nombre de processus du traitement par lots (défaut : {BATCH_MAX_WORKERS})")
+    parser.add_argument('--rate', type=float, default=BATCH_REQUEST_RATE,
+                        help=f"requêtes par seconde vers l'API, tous processus confondus (défaut : {BATCH_REQUEST_RATE}, 0 : sans limite)")
+    snapshot = parser.add_mutually_exclusive_group()
+    snapshot.add_argument('--record', metavar='FICHIER',
+                          help="enregistrer toutes les réponses de l'API consommées dans un instantané (.zip)")
+    snapshot.add_argument('--replay', metavar='FICHIER',
+                          help="analyser depuis un instantané enregistré, sans aucun accès réseau")
+    return parser.parse_known_args(argv)
+
+# Fonction pour créer le contexte d'analyse d'un joueur à partir des options (la configuration sinon)
+def context_from_args(args, player=None):
+    return AnalysisContext(
+        player or args.user or username,
+        args.mode or game_mode,
+        dict(RATED_CHOICES)[args.rated] if args.rated is not None else filter_rated,
+        parse_start_date(args.start) if args.start is not None else start_date,
+        parse_end_date(args.end) if args.end is not None else end_date,
+        args.cache_dir
+    )
 
-    app = QApplication(sys.argv)
-    window = ChessApp(data, adversaries_elo, user_elo_history)
-    window.show()
-    sys.exit(app.exec_())
+# Fonction principale
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    args, qt_args = parse_args(argv[1:])
+
+    snapshot_path = args.record or args.replay
+    if snapshot_path is None:
+        return run_command(args, qt_args, argv[0])
+    if args.record and args.batch:
+        print("L'enregistrement d'un instantané n'est pas disponible pour le traitement par lots")
+        return 2
+    with contextlib.ExitStack() as stack:
+        try:
+            cache_dir = stack.enter_context(snapshot_session(snapshot_path, 'record' if args.record else 'replay'))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            print(f"Instantané illisible : {snapshot_path} ({e})")
+            return 1
+        # Le cache de la session remplace --cache-dir : chaque réponse passe par l'instantané
+        args.cache_dir = cache_dir
+        return run_command(args, qt_args, argv[0])
+
+# Fonction pour exécuter le programme selon les options (export, traitement par lots ou interface)
+def run_command(args, qt_args, program):
+    if args.headless or args.batch:
+        if qt_args:
+            print(f"Options inconnues : {' '.join(qt_args)}")
+            return 2
+        export_format = args.format
+        if export_format is None:
+            extension = os.path.splitext(args.output or '')[1].lower()
+            export_format = next((name for name, ext in EXPORT_FORMATS.items() if ext == extension), 'csv')
+
+        if args.batch:
+            contexts = [context_from_args(args, player) for player in read_batch_file(args.batch)]
+            return run_batch(contexts, args.output_dir, export_format, args.workers, args.rate, args.replay)
+
+        context = context_from_args(args)
+        output_path = args.output or export_file_name(context, export_format)
+        return run_headless(context, output_path, export_format, args.summary or summary_file_path(output_path))
+
+    # L'interface (PyQt5, matplotlib) n'est importée que pour ouvrir la fenêtre
+    import appc_gui
+    return appc_gui.run_gui([program] + qt_args, context_from_args(args))
 
 if __name__ == '__main__':
-    main()
+    # Exécuté comme script : l'interface importe ce module sous le nom appc, qui doit être
+    # ce même module (et non une seconde copie avec ses propres caches et sa configuration)
+    sys.modules.setdefault('appc', sys.modules[__name__])
+    sys.exit(main())
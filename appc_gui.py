@@ -0,0 +1,1400 @@
+import time
+import threading
+from datetime import datetime
+import numpy as np
+from PyQt5.QtWidgets import (
+    QApplication, QMainWindow, QTableView, QVBoxLayout, QHBoxLayout, QWidget,
+    QHeaderView, QPushButton, QTabWidget, QCheckBox, QComboBox, QProgressBar, QLabel, QSpinBox, QDateEdit
+)
+from PyQt5.QtGui import QColor, QBrush, QFont
+from PyQt5.QtCore import Qt, QAbstractItemModel, QAbstractTableModel, QModelIndex, QThread, QTimer, QDate, pyqtSignal
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT
+import matplotlib.dates as mdates
+
+# Interface graphique, importée uniquement au lancement de la fenêtre (voir appc.main)
+from appc import (
+    GAME_MODES, RATED_FILTERS, TABLE_COLUMNS, COLOR_SYMBOLS, RESULT_SYMBOLS, ELO_INCONNU,
+    FetchCancelled, GameHistory, MultiModeAnalysis, fetch_analysis, revalidate_analysis, rating_service, user_progression,
+    parse_start_date, parse_end_date, OPENING_STATS_DTYPE, OpeningIndex, fetch_openings, rating_band_label
+)
+
+# Délai (en millisecondes) avant d'appliquer une modification de la plage de dates
+DATE_RANGE_DELAY = 600
+
+# Feuilles de style de l'interface
+DARK_STYLESHEET = """
+QMainWindow {
+    background-color: #2b2b2b;
+}
+QTableView {
+    background-color: #3c3f41;
+    color: #dcdcdc;
+    gridline-color: #4d4d4d;
+}
+QHeaderView::section {
+    background-color: #3c3f41;
+    color: #dcdcdc;
+    padding: 4px;
+    border: 1px solid #4d4d4d;
+}
+QPushButton {
+    background-color: #4CAF50;
+    color: white;
+    border: none;
+    padding: 8px 16px;
+    text-align: center;
+    font-size: 14px;
+    margin: 4px 2px;
+    border-radius: 4px;
+}
+QPushButton:hover {
+    background-color: #45a049;
+}
+QTabWidget::pane {
+    border-top: 2px solid #C2C7CB;
+}
+QTabBar::tab {
+    background: #3c3f41;
+    color: #dcdcdc;
+    border: 1px solid #4d4d4d;
+    padding: 10px;
+}
+QTabBar::tab:selected {
+    background: #4d4d4d;
+    border-bottom-color: #4d4d4d;
+}
+"""
+
+LIGHT_STYLESHEET = """
+QMainWindow {
+    background-color: #f5f5f5;
+}
+QTableView {
+    background-color: white;
+    color: black;
+    gridline-color: #dcdcdc;
+}
+QHeaderView::section {
+    background-color: #f0f0f0;
+    color: black;
+    padding: 4px;
+    border: 1px solid #dcdcdc;
+}
+QPushButton {
+    background-color: #4CAF50;
+    color: white;
+    border: none;
+    padding: 8px 16px;
+    text-align: center;
+    font-size: 14px;
+    margin: 4px 2px;
+    border-radius: 4px;
+}
+QPushButton:hover {
+    background-color: #45a049;
+}
+QTabWidget::pane {
+    border-top: 2px solid #C2C7CB;
+}
+QTabBar::tab {
+    background: #e0e0e0;
+    color: black;
+    border: 1px solid #C4C4C3;
+    padding: 10px;
+}
+QTabBar::tab:selected {
+    background: #f0f0f0;
+    border-bottom-color: #f0f0f0;
+}
+"""
+
+# Palettes des thèmes nuit (True) et jour (False), calculées une seule fois
+THEMES = {
+    True: {
+        'stylesheet': DARK_STYLESHEET,
+        'figure': '#2b2b2b',  # Fond des graphiques
+        'text': 'white',  # Textes et graduations des graphiques
+        'table_text': '#dcdcdc'  # Texte clair sur fond sombre dans la table
+    },
+    False: {
+        'stylesheet': LIGHT_STYLESHEET,
+        'figure': 'white',
+        'text': 'black',
+        'table_text': None  # Couleur par défaut
+    }
+}
+
+# Fonction pour appliquer les couleurs du thème à un graphique existant (sans le redessiner entièrement)
+def apply_figure_theme(figure, ax, is_dark_mode):
+    palette = THEMES[is_dark_mode]
+    ax.set_facecolor(palette['figure'])
+    figure.patch.set_facecolor(palette['figure'])
+    ax.tick_params(axis='x', colors=palette['text'])
+    ax.tick_params(axis='y', colors=palette['text'])
+    ax.xaxis.label.set_color(palette['text'])
+    ax.yaxis.label.set_color(palette['text'])
+    ax.title.set_color(palette['text'])
+
+# Police des Elo actuels servis depuis une entrée expirée du cache (en cours de revalidation)
+STALE_FONT = QFont()
+STALE_FONT.setItalic(True)
+STALE_TOOLTIP = 'Classement expiré, en cours de revalidation'
+
+# Pinceaux partagés, créés une seule fois par couleur
+_brushes = {}
+
+def brush(color):
+    if color not in _brushes:
+        _brushes[color] = QBrush(QColor(color))
+    return _brushes[color]
+
+# Fonction pour obtenir la couleur de la note de progression P
+def note_color(P):
+    if P < 1:
+        return '#FF8080'  # Rouge clair
+    elif P < 2:
+        return '#FFC080'  # Orange clair
+    elif P < 3:
+        return '#FFFF80'  # Jaune
+    elif P < 5:
+        return '#80FF80'  # Vert clair
+    return '#FF80FF'  # Mauve
+
+# Modèle de table qui trie lui-même ses lignes : les clés de tri précalculées (sort_keys, une par colonne)
+# sont triées d'un bloc par NumPy, sans aucune comparaison ligne à ligne par la vue.
+# self.order donne la ligne des données de chaque ligne affichée (voir source_row).
+class SortedTableModel(QAbstractTableModel):
+    def __init__(self):
+        super().__init__()
+        self.sort_column = None  # Colonne de tri, None pour l'ordre des données
+        self.sort_order = Qt.AscendingOrder
+        self.order = np.zeros(0, dtype='i8')
+
+    def source_row(self, index):
+        return int(self.order[index.row()])
+
+    # Ligne affichée de chaque ligne des données
+    def view_rows(self):
+        positions = np.empty(len(self.order), dtype='i8')
+        positions[self.order] = np.arange(len(self.order))
+        return positions
+
+    # Ordre des lignes pour le tri courant (stable : à clé égale, les lignes gardent l'ordre des données)
+    def sorted_order(self):
+        if self.sort_column is None:
+            return np.arange(self.rowCount())
+        keys = self.sort_keys[self.columns[self.sort_column][0]]
+        if self.sort_order == Qt.AscendingOrder:
+            return np.argsort(keys, kind='stable')
+        # Ordre décroissant stable : tri croissant des clés lues à l'envers, lu à l'envers
+        return len(keys) - 1 - np.argsort(keys[::-1], kind='stable')[::-1]
+
+    # Appelée par la vue (clic sur un en-tête)
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column if column >= 0 else None
+        self.sort_order = order
+        self.reorder(self.sorted_order())
+
+    # Appliquer un nouvel ordre des mêmes lignes : les index persistants (sélection, ligne courante)
+    # suivent leur ligne
+    def reorder(self, order):
+        if np.array_equal(order, self.order):
+            return
+        self.layoutAboutToBeChanged.emit([], QAbstractItemModel.VerticalSortHint)
+        persistent = self.persistentIndexList()
+        rows = [self.source_row(index) for index in persistent]
+        self.order = order
+        positions = self.view_rows()
+        self.changePersistentIndexList(
+            persistent, [self.index(int(positions[row]), index.column()) for row, index in zip(rows, persistent)])
+        self.layoutChanged.emit([], QAbstractItemModel.VerticalSortHint)
+
+# Modèle de la table des parties : les textes et les couleurs sont calculés à la demande,
+# uniquement pour les cellules affichées, directement depuis le jeu de données en colonnes
+class GameTableModel(SortedTableModel):
+    RESULT_BACKGROUNDS = {'W': 'green', 'L': 'red', 'D': 'gray'}
+
+    def __init__(self, dataset, is_dark_mode=False):
+        super().__init__()
+        self.columns = TABLE_COLUMNS
+        self.is_dark_mode = is_dark_mode
+        self.set_dataset(dataset)
+
+    def set_dataset(self, dataset):
+        self.beginResetModel()
+        self.dataset = dataset
+        self.sort_keys = self.compute_sort_keys(dataset)
+        self.order = self.sorted_order()
+        self.endResetModel()
+
+    # Remplacer le jeu de données en signalant uniquement les lignes insérées, supprimées ou modifiées
+    # (les lignes existantes des données gardent leur position : les nouvelles parties sont ajoutées à la fin,
+    # puis le tri est rétabli en déplaçant les lignes affichées)
+    # Renvoie True si le contenu a changé
+    def update_dataset(self, dataset):
+        old = self.dataset
+        common = min(len(old), len(dataset))
+        changed = np.flatnonzero(
+            (old.records[:common] != dataset.records[:common])
+            | (old.adversaires()[:common] != dataset.adversaires()[:common])
+        ) if common else np.array([], dtype='i8')
+
+        if len(dataset) > len(old):
+            self.beginInsertRows(QModelIndex(), len(old), len(dataset) - 1)
+            self.dataset = dataset
+            self.sort_keys = self.compute_sort_keys(dataset)
+            self.order = np.concatenate([self.order, np.arange(len(old), len(dataset))])
+            self.endInsertRows()
+        elif len(dataset) < len(old):
+            # Les lignes supprimées (fin des données) sont d'abord placées à la fin de l'affichage
+            kept = self.order < len(dataset)
+            self.reorder(np.concatenate([self.order[kept], self.order[~kept]]))
+            self.beginRemoveRows(QModelIndex(), len(dataset), len(old) - 1)
+            self.dataset = dataset
+            self.sort_keys = self.compute_sort_keys(dataset)
+            self.order = self.order[:len(dataset)]
+            self.endRemoveRows()
+        else:
+            self.dataset = dataset
+            self.sort_keys = self.compute_sort_keys(dataset)
+        self.reorder(self.sorted_order())
+
+        # Une notification par plage de lignes affichées modifiées consécutives
+        if len(changed):
+            changed = np.sort(self.view_rows()[changed])
+            breaks = np.flatnonzero(np.diff(changed) > 1)
+            for first, last in zip(np.concatenate([[0], breaks + 1]), np.concatenate([breaks, [len(changed) - 1]])):
+                self.dataChanged.emit(self.index(int(changed[first]), 0),
+                                      self.index(int(changed[last]), self.columnCount() - 1))
+        return len(dataset) != len(old) or len(changed) > 0
+
+    def set_dark_mode(self, is_dark_mode):
+        self.is_dark_mode = is_dark_mode
+        if self.rowCount():
+            self.dataChanged.emit(
+                self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1),
+                [Qt.ForegroundRole]
+            )
+
+    # Clés de tri numériques précalculées pour chaque colonne
+    # Les colonnes textuelles sont triées par rang de leur texte
+    @staticmethod
+    def compute_sort_keys(dataset):
+        records = dataset.records
+        name_rank = np.argsort(np.argsort(np.asarray(dataset.names, dtype=object))) if dataset.names else np.array([], dtype='i8')
+        color_rank = np.argsort(np.argsort(COLOR_SYMBOLS))
+        result_rank = np.argsort(np.argsort(RESULT_SYMBOLS))
+        return {
+            'note_progression': records['note_progression'],
+            'date_played': records['date_played'],
+            'adversaire': name_rank[records['adversaire']],
+            'adversaire_elo_initial': records['adversaire_elo_initial'],
+            'player_elo_initial': records['player_elo_initial'],
+            'progression': records['progression'],
+            'adversaire_elo_actuel': records['adversaire_elo_actuel'],
+            'color_symbol': color_rank[records['color']],
+            'result_symbol': result_rank[records['result']]
+        }
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.dataset)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section][1]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.source_row(index)
+        key = self.columns[index.column()][0]
+
+        if role == Qt.DisplayRole:
+            return self.display_text(key, row)
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.ForegroundRole:
+            return self.foreground(key, row)
+        if role == Qt.BackgroundRole:
+            return self.background(key, row)
+        if role in (Qt.FontRole, Qt.ToolTipRole) and key == 'adversaire_elo_actuel' and self.dataset.records['is_stale'][row]:
+            return STALE_FONT if role == Qt.FontRole else STALE_TOOLTIP
+        return None
+
+    def display_text(self, key, row):
+        records = self.dataset.records
+        if key == 'date_played':
+            return datetime.fromtimestamp(int(records['date_played'][row])).strftime('%d/%m/%Y')
+        if key == 'adversaire':
+            return self.dataset.names[records['adversaire'][row]]
+        if key == 'note_progression':
+            return str(float(records['note_progression'][row]))
+        if key == 'progression':
+            progression_value = int(records['progression'][row])
+            return f"+{progression_value}" if progression_value > 0 else f"{progression_value}"
+        if key == 'adversaire_elo_actuel':
+            elo = int(records['adversaire_elo_actuel'][row])
+            return str(elo) if elo != ELO_INCONNU else 'Inconnu'
+        if key == 'color_symbol':
+            return COLOR_SYMBOLS[records['color'][row]]
+        if key == 'result_symbol':
+            return RESULT_SYMBOLS[records['result'][row]]
+        return str(int(records[key][row]))
+
+    def foreground(self, key, row):
+        records = self.dataset.records
+        if key == 'progression':
+            progression_value = records['progression'][row]
+            return brush('green' if progression_value > 0 else 'red' if progression_value < 0 else 'black')
+        if key == 'note_progression':
+            return brush(note_color(records['note_progression'][row]))
+        if key == 'result_symbol':
+            # Texte blanc pour une meilleure lisibilité sur le fond coloré
+            return brush('white')
+        table_text = THEMES[self.is_dark_mode]['table_text']
+        return brush(table_text) if table_text is not None else None
+
+    def background(self, key, row):
+        records = self.dataset.records
+        # Mettre en évidence la ligne de l'utilisateur
+        if records['is_user'][row]:
+            return brush('gold')
+        if key == 'result_symbol':
+            return brush(self.RESULT_BACKGROUNDS.get(RESULT_SYMBOLS[records['result'][row]], 'white'))
+        return None
+
+# Rendu incrémental d'un histogramme en barres
+# Les artistes (barres, graduations, annotation) sont créés une fois puis mis à jour sur place ;
+# les barres ne sont recréées que si leur nombre change, et les redessins sont regroupés par draw_idle.
+class BarChartRenderer:
+    def __init__(self, figure, xlabel, ylabel, title):
+        self.figure = figure
+        self.ax = figure.add_subplot(111)
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
+        self.ax.set_title(title)
+        self.ax.tick_params(axis='x', rotation=90)
+        self.bars = None
+        self.labels = None
+
+        # Flèche indiquant la position de l'utilisateur, masquée tant qu'elle n'est pas utilisée
+        self.annotation = self.ax.annotate(
+            'Vous êtes ici',
+            xy=(0, 0),
+            xytext=(0, 0),
+            arrowprops=dict(facecolor='red', shrink=0.05, width=2, headwidth=8),
+            ha='center',
+            color='red',
+            fontsize=12
+        )
+        self.annotation.set_visible(False)
+
+    # Changer les titres des axes et du graphique sans toucher à leurs couleurs (thème)
+    def set_texts(self, xlabel, ylabel, title):
+        self.ax.xaxis.label.set_text(xlabel)
+        self.ax.yaxis.label.set_text(ylabel)
+        self.ax.title.set_text(title)
+
+    def update(self, labels, values, colors, user_index=None):
+        labels = list(labels)
+        values = list(values)
+        layout_changed = self.bars is None or len(self.bars) != len(values)
+
+        if layout_changed:
+            if self.bars is not None:
+                self.bars.remove()
+            self.bars = self.ax.bar(range(len(values)), values, color=colors)
+        else:
+            for bar, value, color in zip(self.bars, values, colors):
+                bar.set_height(value)
+                bar.set_facecolor(color)
+
+        # Les graduations ne sont réécrites que si les joueurs ont changé
+        if labels != self.labels:
+            self.ax.set_xticks(range(len(labels)))
+            self.ax.set_xticklabels(labels)
+            self.labels = labels
+
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+        # Déplacer la flèche vers la position de l'utilisateur
+        if user_index is not None:
+            self.annotation.xy = (user_index, values[user_index])
+            self.annotation.set_position((user_index, max(values) * 1.05))
+        self.annotation.set_visible(user_index is not None)
+
+        if layout_changed:
+            self.figure.tight_layout()
+        self.figure.canvas.draw_idle()
+
+# Paramètres de l'histogramme des Elos actuels des adversaires
+HISTOGRAM_DETAIL_THRESHOLD = 150  # Au plus ce nombre d'adversaires visibles : une barre par adversaire
+HISTOGRAM_TARGET_BINS = 40  # Nombre de classes visé pour l'histogramme agrégé
+HISTOGRAM_BIN_WIDTHS = [10, 20, 25, 50, 100, 200, 250, 500]  # Largeurs de classe possibles (Elo)
+HISTOGRAM_MAX_ELO = 4000  # Borne des champs de sélection de la plage Elo
+
+# Classe pour le nouvel histogramme des Elos actuels des adversaires
+# Les Elos sont conservés dans un tableau trié : la plage visible et la position de l'utilisateur
+# sont trouvées par recherche dichotomique. Au-delà de HISTOGRAM_DETAIL_THRESHOLD adversaires
+# visibles, l'histogramme est agrégé par classes d'Elo ; en zoomant sur une plage étroite,
+# il revient à une barre par adversaire.
+class EloHistogram(QWidget):
+    def __init__(self, adversaries_elo, parent_app):
+        super().__init__()
+        self.parent_app = parent_app
+        self.show_user = True  # Par défaut, afficher l'Elo de l'utilisateur
+        self.zoom_range = None  # Plage Elo choisie par l'utilisateur, None pour tout afficher
+        self.set_adversaries(adversaries_elo)
+
+        self.init_ui()
+
+    # Trier une seule fois les Elos des adversaires (les redessins ne font que des recherches)
+    def set_adversaries(self, adversaries_elo):
+        self.adversaries_elo_original = adversaries_elo  # Lu seulement, jamais modifié
+        pairs = [(adv, elo) for adv, elo in adversaries_elo.items() if elo is not None]
+        names = np.array([adv for adv, _ in pairs], dtype=object)
+        elos = np.array([elo for _, elo in pairs], dtype='i4')
+        order = np.argsort(elos, kind='stable')  # Tri par Elo ascendant
+        self.sorted_names = names[order]
+        self.sorted_elos = elos[order]
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        # Ajouter le graphique (figure indépendante de l'état global de pyplot)
+        self.figure = Figure()
+        self.canvas = FigureCanvas(self.figure)
+        self.renderer = BarChartRenderer(self.figure, 'Joueurs', 'Elo actuel', 'Elo actuel des adversaires')
+        apply_figure_theme(self.figure, self.renderer.ax, self.parent_app.is_dark_mode)
+        layout.addWidget(self.canvas)
+
+        # Sélection de la plage Elo affichée (zoom)
+        zoom_bar = QHBoxLayout()
+        layout.addLayout(zoom_bar)
+        zoom_bar.addWidget(QLabel("Plage Elo :"))
+        self.min_elo_input = QSpinBox()
+        self.max_elo_input = QSpinBox()
+        for spin_box in (self.min_elo_input, self.max_elo_input):
+            spin_box.setRange(0, HISTOGRAM_MAX_ELO)
+            spin_box.setKeyboardTracking(False)
+            spin_box.valueChanged.connect(self.on_zoom_changed)
+            zoom_bar.addWidget(spin_box)
+        self.reset_zoom_button = QPushButton("Tout afficher")
+        self.reset_zoom_button.clicked.connect(self.reset_zoom)
+        zoom_bar.addWidget(self.reset_zoom_button)
+        zoom_bar.addStretch()
+
+        # Ajouter une case à cocher pour afficher/masquer l'Elo de l'utilisateur
+        self.checkbox = QCheckBox("Afficher mon Elo")
+        self.checkbox.setChecked(True)
+        self.checkbox.stateChanged.connect(self.update_graph)
+        layout.addWidget(self.checkbox)
+
+        self.plot_graph()
+
+    def on_zoom_changed(self):
+        self.zoom_range = (self.min_elo_input.value(), self.max_elo_input.value())
+        self.plot_graph()
+
+    def reset_zoom(self):
+        self.zoom_range = None
+        self.plot_graph()
+
+    # Plage Elo affichée : celle choisie par l'utilisateur, sinon toutes les données
+    def visible_range(self, user_elo_actuel):
+        if self.zoom_range is not None:
+            return min(self.zoom_range), max(self.zoom_range)
+        bounds = list(self.sorted_elos[[0, -1]]) if len(self.sorted_elos) else []
+        if user_elo_actuel is not None:
+            bounds.append(user_elo_actuel)
+        return (int(min(bounds)), int(max(bounds))) if bounds else (0, 0)
+
+    def plot_graph(self):
+        # Elo actuel de l'utilisateur si coché : valeur mémorisée par le service de classements,
+        # sans requête depuis le fil de l'interface (FetchWorker et RevalidateWorker la rafraîchissent)
+        user_elo_actuel = None
+        if self.checkbox.isChecked():
+            user_elo_actuel = rating_service.cached_rating(self.parent_app.context.username, self.parent_app.rating_type)
+
+        low, high = self.visible_range(user_elo_actuel)
+        for spin_box, value in ((self.min_elo_input, low), (self.max_elo_input, high)):
+            spin_box.blockSignals(True)
+            spin_box.setValue(value)
+            spin_box.blockSignals(False)
+
+        # Adversaires visibles : une tranche du tableau trié, trouvée par dichotomie
+        start = int(np.searchsorted(self.sorted_elos, low, side='left'))
+        stop = int(np.searchsorted(self.sorted_elos, high, side='right'))
+
+        title = 'Elo actuel des adversaires'
+        if user_elo_actuel is not None and len(self.sorted_elos):
+            # Percentile de l'utilisateur : part des adversaires dont l'Elo est inférieur au sien
+            below = int(np.searchsorted(self.sorted_elos, user_elo_actuel, side='left'))
+            title += f' (vous dépassez {100 * below / len(self.sorted_elos):.0f} % d\'entre eux)'
+
+        if stop - start <= HISTOGRAM_DETAIL_THRESHOLD:
+            self.renderer.set_texts('Joueurs', 'Elo actuel', title)
+            self.plot_opponents(start, stop, user_elo_actuel, low, high)
+        else:
+            self.renderer.set_texts('Elo actuel', "Nombre d'adversaires", title)
+            self.plot_bins(self.sorted_elos[start:stop], user_elo_actuel, low, high)
+
+    # Une barre par adversaire visible, l'utilisateur inséré à sa place
+    def plot_opponents(self, start, stop, user_elo_actuel, low, high):
+        adversaires_sorted = list(self.sorted_names[start:stop])
+        elos_sorted = [int(elo) for elo in self.sorted_elos[start:stop]]
+        colors = ['blue'] * len(adversaires_sorted)
+
+        user_index = None
+        if user_elo_actuel is not None and low <= user_elo_actuel <= high:
+            # Position d'insertion (avant le premier Elo supérieur ou égal), par dichotomie
+            user_index = int(np.searchsorted(self.sorted_elos, user_elo_actuel, side='left')) - start
+            adversaires_sorted.insert(user_index, self.parent_app.context.username)
+            elos_sorted.insert(user_index, user_elo_actuel)
+            colors.insert(user_index, 'gold')
+
+        self.renderer.update(adversaires_sorted, elos_sorted, colors, user_index)
+
+    # Histogramme agrégé : nombre d'adversaires par classe d'Elo
+    def plot_bins(self, visible_elos, user_elo_actuel, low, high):
+        width = next((w for w in HISTOGRAM_BIN_WIDTHS if (high - low) / w <= HISTOGRAM_TARGET_BINS), HISTOGRAM_BIN_WIDTHS[-1])
+        # Dernière borne strictement supérieure à high : les Elos égaux à high sont comptés
+        edges = np.arange(low // width * width, (high // width + 1) * width + 1, width)
+        # Le tableau étant trié, les effectifs se déduisent des positions des bornes
+        counts = np.diff(np.searchsorted(visible_elos, edges, side='left'))
+        labels = [f'{edge}-{edge + width - 1}' for edge in edges[:-1]]
+        colors = ['blue'] * len(counts)
+
+        user_index = None
+        if user_elo_actuel is not None and edges[0] <= user_elo_actuel < edges[-1]:
+            user_index = int(np.searchsorted(edges, user_elo_actuel, side='right')) - 1
+            colors[user_index] = 'gold'
+
+        self.renderer.update(labels, [int(count) for count in counts], colors, user_index)
+
+    def update_graph(self):
+        self.plot_graph()
+
+    # Changer de thème : recolorer le graphique existant, sans recalcul ni nouvelle figure
+    def apply_theme(self, is_dark_mode):
+        for ax in self.figure.axes:
+            apply_figure_theme(self.figure, ax, is_dark_mode)
+        self.canvas.draw_idle()
+
+# Classe pour le graphique de progression existant
+class ProgressionGraph(QWidget):
+    def __init__(self, data, parent_app):
+        super().__init__()
+        self.original_data = data  # Stocker les données originales sans les modifier
+        self.parent_app = parent_app  # Référence à l'application principale pour connaître le mode
+        self.show_user = True  # Par défaut, afficher la progression de l'utilisateur
+
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        # Ajouter le graphique (figure indépendante de l'état global de pyplot)
+        self.figure = Figure()
+        self.canvas = FigureCanvas(self.figure)
+        self.renderer = BarChartRenderer(self.figure, 'Joueurs', 'Progression Elo', 'Progression des adversaires')
+        apply_figure_theme(self.figure, self.renderer.ax, self.parent_app.is_dark_mode)
+        layout.addWidget(self.canvas)
+
+        # Ajouter une case à cocher pour afficher/masquer la progression de l'utilisateur
+        self.checkbox = QCheckBox("Afficher ma progression")
+        self.checkbox.setChecked(True)
+        self.checkbox.stateChanged.connect(self.update_graph)
+        layout.addWidget(self.checkbox)
+
+        self.plot_graph()
+
+    def plot_graph(self):
+        # Lire les colonnes du jeu de données (aucune copie des lignes)
+        is_user = self.original_data['is_user']
+        adversaires = self.original_data.adversaires()[~is_user]
+        progressions = self.original_data['progression'][~is_user]
+
+        # Trier les données par progression croissante (tri stable, comme le tri Python)
+        order = np.argsort(progressions, kind='stable')
+        adversaires_sorted = list(adversaires[order])
+        progressions_sorted = list(progressions[order])
+        colors = ['blue'] * len(adversaires_sorted)
+
+        # Afficher la progression de l'utilisateur si coché
+        if self.checkbox.isChecked():
+            # Récupérer les données de l'utilisateur
+            user_rows = np.flatnonzero(is_user)
+            if len(user_rows):
+                user_progression = self.original_data['progression'][user_rows[0]]
+                # Trouver la position pour insérer l'utilisateur (première progression >= la sienne)
+                user_index = int(np.searchsorted(progressions[order], user_progression, side='left'))
+                adversaires_sorted.insert(user_index, self.parent_app.context.username)
+                progressions_sorted.insert(user_index, user_progression)
+                colors.insert(user_index, 'gold')
+            else:
+                # Si l'utilisateur n'a pas de données, on n'affiche rien de plus
+                user_index = None
+        else:
+            user_index = None
+
+        # Mettre à jour l'histogramme et la flèche de l'utilisateur
+        self.renderer.update(adversaires_sorted, progressions_sorted, colors, user_index)
+
+    def update_graph(self):
+        self.plot_graph()
+
+    # Changer de thème : recolorer le graphique existant, sans recalcul ni nouvelle figure
+    def apply_theme(self, is_dark_mode):
+        for ax in self.figure.axes:
+            apply_figure_theme(self.figure, ax, is_dark_mode)
+        self.canvas.draw_idle()
+
+# Nombre maximal de points tracés pour l'évolution de l'Elo (après sous-échantillonnage)
+TIMELINE_MAX_POINTS = 1500
+
+# Fonction de sous-échantillonnage LTTB (Largest-Triangle-Three-Buckets)
+# Renvoie les indices des points conservés : le premier, le dernier, et dans chaque intervalle
+# le point qui forme le plus grand triangle avec ses voisins, ce qui préserve l'allure de la courbe
+def lttb_indices(x, y, threshold):
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='f8')
+    y = np.asarray(y, dtype='f8')
+    # Bornes des intervalles (le premier et le dernier point sont toujours conservés)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Point moyen de l'intervalle suivant
+        next_start, next_stop = stop, edges[i + 2] if i + 2 < len(edges) else n
+        mean_x = x[next_start:next_stop].mean()
+        mean_y = y[next_start:next_stop].mean()
+        # Aire du triangle (point précédent, candidat, point moyen suivant)
+        areas = np.abs(
+            (x[previous] - mean_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (mean_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        indices[i + 1] = previous
+    return indices
+
+# Classe pour le graphique de l'évolution de l'Elo de l'utilisateur dans le temps
+# La courbe est sous-échantillonnée (LTTB) pour la fenêtre visible, puis de nouveau à chaque
+# déplacement ou zoom : le nombre de points tracés reste borné quelle que soit la taille de l'historique.
+class RatingTimeline(QWidget):
+    def __init__(self, user_elo_history, parent_app):
+        super().__init__()
+        self.parent_app = parent_app
+        self.x = np.array([], dtype='f8')  # Dates au format matplotlib
+        self.y = np.array([], dtype='f8')
+        self.full_xlim = None  # Fenêtre qui montre tout l'historique
+
+        self.init_ui()
+        self.set_history(user_elo_history)
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        # Ajouter le graphique (figure indépendante de l'état global de pyplot) et ses outils de navigation
+        self.figure = Figure()
+        self.canvas = FigureCanvas(self.figure)
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_xlabel('Date')
+        self.ax.set_ylabel('Elo')
+        self.ax.set_title('Évolution de mon Elo')
+        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%m/%Y'))
+        self.line, = self.ax.plot([], [], color='tab:blue', linewidth=1)
+        apply_figure_theme(self.figure, self.ax, self.parent_app.is_dark_mode)
+        layout.addWidget(NavigationToolbar2QT(self.canvas, self))
+        layout.addWidget(self.canvas)
+
+        # Rééchantillonner à chaque changement de la fenêtre visible
+        self.ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+
+    # Appelée à chaque mise à jour des données : un historique inchangé (classements revalidés) ne touche pas
+    # au graphique, et la fenêtre choisie par l'utilisateur (déplacement, zoom) est conservée
+    def set_history(self, user_elo_history):
+        x = mdates.date2num(user_elo_history['date_played'].astype('datetime64[s]'))
+        y = user_elo_history['elo'].astype('f8')
+        if np.array_equal(x, self.x) and np.array_equal(y, self.y):
+            return
+        low, high = self.ax.get_xlim()
+        # La vue suit l'historique si elle le montrait en entier, ou si elle ne contient aucune de ses parties
+        follow = (self.full_xlim is None or np.allclose((low, high), self.full_xlim)
+                  or not np.any((x >= low) & (x <= high)))
+        self.x, self.y = x, y
+        if len(self.x):
+            margin = max((self.x[-1] - self.x[0]) * 0.02, 1)
+            self.full_xlim = (self.x[0] - margin, self.x[-1] + margin)
+            if follow:
+                self.ax.set_ylim(self.y.min() - 20, self.y.max() + 20)
+                self.ax.set_xlim(*self.full_xlim)  # Déclenche le rééchantillonnage
+            else:
+                self.on_xlim_changed(self.ax)  # Rééchantillonner la fenêtre actuelle
+        else:
+            self.full_xlim = None
+            self.line.set_data([], [])
+        self.canvas.draw_idle()
+
+    def on_xlim_changed(self, ax):
+        low, high = ax.get_xlim()
+        # Points visibles (plus un voisin de chaque côté pour que la courbe atteigne les bords)
+        start = max(int(np.searchsorted(self.x, low, side='left')) - 1, 0)
+        stop = min(int(np.searchsorted(self.x, high, side='right')) + 1, len(self.x))
+        indices = start + lttb_indices(self.x[start:stop], self.y[start:stop], TIMELINE_MAX_POINTS)
+        self.line.set_data(self.x[indices], self.y[indices])
+        self.canvas.draw_idle()
+
+    # Changer de thème : recolorer le graphique existant, sans recalcul ni nouvelle figure
+    def apply_theme(self, is_dark_mode):
+        apply_figure_theme(self.figure, self.ax, is_dark_mode)
+        self.canvas.draw_idle()
+
+# Colonnes de la table des ouvertures : (clé, titre)
+OPENING_TABLE_COLUMNS = [
+    ('name', 'Ouverture'),
+    ('eco', 'ECO'),
+    ('color', 'Couleur'),
+    ('band', 'Elo adv.'),
+    ('games', 'Parties'),
+    ('wins', 'Victoires'),
+    ('draws', 'Nulles'),
+    ('losses', 'Défaites'),
+    ('score', 'Score')
+]
+
+# Modèle de la table des ouvertures, lu à la demande depuis les statistiques en colonnes (OPENING_STATS_DTYPE)
+class OpeningTableModel(SortedTableModel):
+    def __init__(self, is_dark_mode=False):
+        super().__init__()
+        self.columns = OPENING_TABLE_COLUMNS
+        self.is_dark_mode = is_dark_mode
+        self.set_stats(np.zeros(0, dtype=OPENING_STATS_DTYPE), [])
+
+    def set_stats(self, stats, openings):
+        self.beginResetModel()
+        self.stats = stats
+        self.openings = openings  # Ouvertures (Opening), référencées par la colonne 'opening'
+        # Score de l'utilisateur (victoire : 1, nulle : 1/2), en pourcentage
+        self.scores = (stats['wins'] + stats['draws'] / 2) * 100 / np.maximum(stats['games'], 1)
+        self.sort_keys = self.compute_sort_keys()
+        self.order = self.sorted_order()
+        self.endResetModel()
+
+    def set_dark_mode(self, is_dark_mode):
+        self.is_dark_mode = is_dark_mode
+        if self.rowCount():
+            self.dataChanged.emit(
+                self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1),
+                [Qt.ForegroundRole]
+            )
+
+    # Clés de tri numériques précalculées (rang du texte pour le nom et le code ECO)
+    def compute_sort_keys(self):
+        stats = self.stats
+        name_rank = np.argsort(np.argsort(np.array([opening.name for opening in self.openings], dtype=object)))
+        eco_rank = np.argsort(np.argsort(np.array([opening.eco for opening in self.openings], dtype=object)))
+        return {
+            'name': name_rank[stats['opening']],
+            'eco': eco_rank[stats['opening']],
+            'color': stats['color'],
+            'band': stats['band'],
+            'games': stats['games'],
+            'wins': stats['wins'],
+            'draws': stats['draws'],
+            'losses': stats['losses'],
+            'score': self.scores
+        }
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.stats)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section][1]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.source_row(index)
+        key = self.columns[index.column()][0]
+
+        if role == Qt.DisplayRole:
+            return self.display_text(key, row)
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignLeft | Qt.AlignVCenter if key == 'name' else Qt.AlignCenter
+        if role == Qt.ForegroundRole:
+            table_text = THEMES[self.is_dark_mode]['table_text']
+            return brush(table_text) if table_text is not None else None
+        return None
+
+    def display_text(self, key, row):
+        stats = self.stats
+        if key == 'name':
+            return self.openings[stats['opening'][row]].name
+        if key == 'eco':
+            return self.openings[stats['opening'][row]].eco or '-'
+        if key == 'color':
+            return COLOR_SYMBOLS[stats['color'][row]]
+        if key == 'band':
+            return rating_band_label(int(stats['band'][row]))
+        if key == 'score':
+            return f"{self.scores[row]:.1f} %"
+        return str(int(stats[key][row]))
+
+# Onglet des statistiques d'ouvertures du mode de jeu et du type de partie affichés
+# L'index des ouvertures est construit en arrière-plan après chaque récupération (voir OpeningsWorker)
+class OpeningsTab(QWidget):
+    def __init__(self, parent_app):
+        super().__init__()
+        self.parent_app = parent_app
+        self.opening_index = OpeningIndex.empty()
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        options_bar = QHBoxLayout()
+        layout.addLayout(options_bar)
+        self.band_check = QCheckBox("Par tranche d'Elo de l'adversaire")
+        self.band_check.setChecked(True)
+        self.band_check.toggled.connect(self.update_table)
+        options_bar.addWidget(self.band_check)
+        options_bar.addStretch()
+        self.status_label = QLabel()
+        options_bar.addWidget(self.status_label)
+
+        self.table_model = OpeningTableModel(self.parent_app.is_dark_mode)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setSortingEnabled(True)
+        # Les ouvertures les plus jouées d'abord
+        self.table.sortByColumn([key for key, _ in OPENING_TABLE_COLUMNS].index('games'), Qt.DescendingOrder)
+        layout.addWidget(self.table)
+        self.show_summary()
+
+    def set_index(self, opening_index):
+        self.opening_index = opening_index
+        self.update_table()
+
+    # Recalculer les statistiques pour le mode de jeu et le type de partie affichés
+    def update_table(self):
+        stats = self.opening_index.table(self.parent_app.game_mode, self.parent_app.filter_rated,
+                                         by_band=self.band_check.isChecked())
+        self.table_model.set_stats(stats, self.opening_index.openings)
+        self.show_summary()
+
+    def show_summary(self):
+        stats = self.table_model.stats
+        self.status_label.setText(f"{int(stats['games'].sum())} parties, {len(np.unique(stats['opening']))} ouvertures")
+
+    def set_status(self, text):
+        self.status_label.setText(text)
+
+    def apply_theme(self, is_dark_mode):
+        self.table_model.set_dark_mode(is_dark_mode)
+
+# Fil d'exécution qui récupère les données en arrière-plan
+# Les signaux sont reçus dans le fil de l'interface (connexions mises en file d'attente)
+class FetchWorker(QThread):
+    progress = pyqtSignal(str, int, int)  # Étape, fait, total
+    partial = pyqtSignal(object)  # MultiModeAnalysis partielle
+    completed = pyqtSignal(object)  # MultiModeAnalysis finale
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    # previous : analyse complète à compléter (rafraîchissement incrémental, sans résultats partiels)
+    def __init__(self, context, previous=None):
+        super().__init__()
+        self.context = context
+        self.previous = previous
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            # Récupérer les classements de l'utilisateur ici, pour que l'interface les trouve en mémoire
+            rating_service.get_ratings(self.context.username)
+            on_partial = self.partial.emit if self.previous is None else None
+            analysis = fetch_analysis(self.context, self.progress.emit, on_partial, self.cancel_event, self.previous,
+                                      serve_stale=True)
+        except FetchCancelled:
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Récupération des données annulée")
+            self.cancelled.emit()
+        except Exception as e:
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Échec de la récupération : {e}")
+            self.failed.emit(str(e))
+        else:
+            self.completed.emit(analysis)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+# Fil d'exécution qui revalide en arrière-plan les classements expirés servis par le cache
+class RevalidateWorker(QThread):
+    partial = pyqtSignal(object)  # MultiModeAnalysis avec les classements déjà revalidés
+    completed = pyqtSignal(object)  # MultiModeAnalysis entièrement revalidée
+
+    def __init__(self, context, analysis):
+        super().__init__()
+        self.context = context
+        self.analysis = analysis
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            # Rafraîchir aussi les classements de l'utilisateur s'ils ont expiré
+            rating_service.get_ratings(self.context.username)
+            analysis = revalidate_analysis(self.context, self.analysis, self.partial.emit, self.cancel_event)
+        except FetchCancelled:
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Revalidation des classements annulée")
+        except Exception as e:
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Échec de la revalidation des classements : {e}")
+        else:
+            self.completed.emit(analysis)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+# Fil d'exécution qui construit l'index des ouvertures en arrière-plan (PGN analysés dans un pool de processus)
+class OpeningsWorker(QThread):
+    progress = pyqtSignal(str, int, int)  # Étape, fait, total
+    completed = pyqtSignal(object)  # OpeningIndex
+
+    def __init__(self, context, archive_files=None):
+        super().__init__()
+        self.context = context
+        self.archive_files = archive_files  # Archives de la récupération terminée (MultiModeAnalysis.archive_files)
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            opening_index = fetch_openings(self.context, self.progress.emit, self.cancel_event, self.archive_files)
+        except FetchCancelled:
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Analyse des ouvertures annulée")
+        except Exception as e:
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Échec de l'analyse des ouvertures : {e}")
+        else:
+            self.completed.emit(opening_index)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+# Classe principale de l'application
+class ChessApp(QMainWindow):
+    def __init__(self, analysis, context):
+        super().__init__()
+        self.analysis = analysis  # Résultats de tous les modes de jeu (MultiModeAnalysis)
+        self.context = context  # Joueur analysé, filtres et dossier de cache (AnalysisContext)
+        self.game_mode = context.game_mode
+        self.rating_type = context.rating_type
+        self.filter_rated = context.filter_rated
+        self.is_dark_mode = False  # Mode jour par défaut
+        self.worker = None  # Récupération en arrière-plan en cours
+        self.revalidator = None  # Revalidation des classements expirés en cours
+        self.openings_worker = None  # Construction de l'index des ouvertures en cours
+        self.pending_date_range = False  # Plage de dates modifiée pendant une récupération
+
+        # Charger les données du mode courant et y ajouter l'entrée de l'utilisateur
+        self.load_mode_data()
+
+        # Création du widget central et du layout principal
+        self.central_widget = QWidget()
+        self.setCentralWidget(self.central_widget)
+        self.main_layout = QVBoxLayout()
+        self.central_widget.setLayout(self.main_layout)
+
+        # Barre supérieure : choix du mode de jeu, du type de partie et bouton nuit/jour
+        top_bar = QHBoxLayout()
+        self.main_layout.addLayout(top_bar)
+
+        self.mode_selector = QComboBox()
+        self.mode_selector.addItems(self.available_modes())
+        self.mode_selector.setCurrentText(self.game_mode)
+        self.mode_selector.currentTextChanged.connect(self.change_mode)
+        top_bar.addWidget(self.mode_selector)
+
+        self.rated_selector = QComboBox()
+        for label, value in RATED_FILTERS:
+            self.rated_selector.addItem(label, value)
+        self.rated_selector.setCurrentIndex([value for _, value in RATED_FILTERS].index(self.filter_rated))
+        self.rated_selector.currentIndexChanged.connect(self.change_mode)
+        top_bar.addWidget(self.rated_selector)
+
+        # Plage de dates : seules les archives des mois concernés sont relues
+        # (les changements rapprochés sont regroupés avant de relancer la récupération)
+        self.date_range_check = QCheckBox('Période')
+        self.date_range_check.setChecked(context.start_date is not None or context.end_date is not None)
+        top_bar.addWidget(self.date_range_check)
+        today = QDate.currentDate()
+        self.start_date_edit = QDateEdit(self.to_qdate(context.start_date) or today.addMonths(-3))
+        self.end_date_edit = QDateEdit(self.to_qdate(context.end_date) or today)
+        for date_edit in (self.start_date_edit, self.end_date_edit):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat('dd/MM/yyyy')
+            date_edit.setEnabled(self.date_range_check.isChecked())
+            top_bar.addWidget(date_edit)
+        self.date_range_timer = QTimer(self)
+        self.date_range_timer.setSingleShot(True)
+        self.date_range_timer.setInterval(DATE_RANGE_DELAY)
+        self.date_range_timer.timeout.connect(self.change_date_range)
+        self.date_range_check.toggled.connect(self.on_date_range_edited)
+        self.start_date_edit.dateChanged.connect(self.on_date_range_edited)
+        self.end_date_edit.dateChanged.connect(self.on_date_range_edited)
+        top_bar.addStretch()
+
+        # Bouton de bascule du mode nuit/jour
+        self.toggle_button = QPushButton('🌞')  # Symbole du soleil pour le mode jour
+        self.toggle_button.setFixedSize(30, 30)
+        self.toggle_button.setStyleSheet('border: none; background-color: transparent; font-size: 20px;')
+        self.toggle_button.clicked.connect(self.toggle_dark_mode)
+        top_bar.addWidget(self.toggle_button)
+
+        # Création des onglets
+        self.tabs = QTabWidget()
+        self.main_layout.addWidget(self.tabs)
+
+        # Onglet principal avec la table
+        self.table_tab = QWidget()
+        self.tabs.addTab(self.table_tab, "Tableau")
+
+        # Onglet pour le graphique de progression
+        self.graph_tab = ProgressionGraph(self.data, self)
+        self.tabs.addTab(self.graph_tab, "Graphique progression")
+
+        # Onglet pour l'histogramme des Elos actuels
+        self.elo_histogram_tab = EloHistogram(self.adversaries_elo, self)
+        self.tabs.addTab(self.elo_histogram_tab, "Elo actuel adversaires")
+
+        # Onglet pour l'évolution de l'Elo de l'utilisateur
+        self.timeline_tab = RatingTimeline(self.user_elo_history, self)
+        self.tabs.addTab(self.timeline_tab, "Évolution de mon Elo")
+
+        # Onglet des statistiques d'ouvertures
+        self.openings_tab = OpeningsTab(self)
+        self.tabs.addTab(self.openings_tab, "Ouvertures")
+
+        # Configurer l'onglet de la table
+        self.setup_table_tab()
+
+        # Appliquer le style initial
+        self.apply_styles()
+
+    # Modes proposés : les modes habituels puis ceux présents dans les archives
+    def available_modes(self):
+        return list(dict.fromkeys(GAME_MODES + self.analysis.modes()))
+
+    # Mettre à jour la liste des modes sans déclencher de changement de mode
+    def update_mode_selector(self):
+        self.mode_selector.blockSignals(True)
+        self.mode_selector.clear()
+        self.mode_selector.addItems(self.available_modes())
+        self.mode_selector.setCurrentText(self.game_mode)
+        self.mode_selector.blockSignals(False)
+
+    # Charger les données du mode courant depuis l'analyse (sans requête sur les archives)
+    # L'entrée de l'utilisateur n'est ajoutée qu'aux résultats complets
+    def load_mode_data(self, with_user_entry=True):
+        self.setWindowTitle(f"Historique des parties {self.game_mode.upper()} de {self.context.username}")
+        data, adversaries_elo, user_elo_history = self.analysis.get(self.game_mode, self.filter_rated)
+
+        # Les données ne sont jamais modifiées (l'entrée de l'utilisateur crée un nouveau jeu de données)
+        self.data = data
+        self.adversaries_elo = adversaries_elo  # Dictionnaire des adversaires uniques et leur Elo actuel
+        self.user_elo_history = user_elo_history  # Tableau (date, elo) trié par date
+
+        # Récupérer les données de l'utilisateur et les ajouter à self.data
+        if with_user_entry:
+            self.add_user_entry()
+
+    # Mettre à jour la table et les graphiques après un changement de données
+    # incremental : les données affichées sont mises à jour ligne par ligne (même mode de jeu),
+    # et les graphiques ne sont redessinés que si elles ont changé
+    def update_views(self, incremental=False):
+        if not self.load_data(incremental):
+            return
+        self.graph_tab.original_data = self.data
+        self.graph_tab.update_graph()
+        self.elo_histogram_tab.set_adversaries(self.adversaries_elo)
+        self.elo_histogram_tab.update_graph()
+        self.timeline_tab.set_history(self.user_elo_history)
+
+    @staticmethod
+    def to_qdate(date):
+        return QDate(date.year, date.month, date.day) if date is not None else None
+
+    def on_date_range_edited(self):
+        self.start_date_edit.setEnabled(self.date_range_check.isChecked())
+        self.end_date_edit.setEnabled(self.date_range_check.isChecked())
+        self.date_range_timer.start()
+
+    # Appliquer la plage de dates : nouvelle récupération limitée aux archives des mois concernés
+    # (les mois terminés sont lus depuis le cache, sans requête)
+    def change_date_range(self):
+        if self.worker is not None:
+            # Une récupération est en cours : la plage sera appliquée à la fin de celle-ci
+            self.pending_date_range = True
+            return
+        if self.date_range_check.isChecked():
+            start = self.start_date_edit.date().toString('dd/MM/yyyy')
+            end = self.end_date_edit.date().toString('dd/MM/yyyy')
+            start_date, end_date = parse_start_date(start), parse_end_date(end)
+        else:
+            start_date, end_date = None, None
+        if (start_date, end_date) == (self.context.start_date, self.context.end_date):
+            return
+        self.context.start_date, self.context.end_date = start_date, end_date
+        # Les parties déjà analysées ne couvrent pas la nouvelle plage : récupération complète
+        self.refresh_data(refresh_user=False, incremental=False)
+
+    # Changer de mode de jeu ou de type de partie : bascule instantanée, sans nouveau téléchargement
+    def change_mode(self):
+        self.game_mode = self.mode_selector.currentText()
+        self.rating_type = f'chess_{self.game_mode}'
+        self.filter_rated = self.rated_selector.currentData()
+        self.load_mode_data(with_user_entry=self.worker is None)
+        self.update_views()
+        self.openings_tab.update_table()
+
+    def add_user_entry(self):
+        # Progression de l'utilisateur depuis son Elo le plus bas (None sans partie ou sans Elo actuel)
+        progression = user_progression(self.context, self.user_elo_history, self.rating_type, len(self.data))
+
+        if progression is not None:
+            # Ajouter l'entrée de l'utilisateur aux données
+            self.data = self.data.with_row(
+                self.context.username,
+                note_progression=progression.note_progression,
+                date_played=progression.lowest_elo_date,
+                adversaire_elo_initial=progression.elo_actuel,
+                player_elo_initial=progression.lowest_elo,
+                progression=progression.progression,
+                adversaire_elo_actuel=progression.elo_actuel,
+                color=COLOR_SYMBOLS.index('-'),  # Non applicable
+                result=RESULT_SYMBOLS.index('-'),  # Non applicable
+                is_user=True
+            )
+
+    def toggle_dark_mode(self):
+        self.is_dark_mode = not self.is_dark_mode
+        if self.is_dark_mode:
+            self.toggle_button.setText('🌜')  # Symbole de la lune pour le mode nuit
+        else:
+            self.toggle_button.setText('🌞')  # Symbole du soleil pour le mode jour
+        self.apply_styles()
+        self.graph_tab.apply_theme(self.is_dark_mode)  # Recolorer le graphique pour le mode nuit/jour
+        self.elo_histogram_tab.apply_theme(self.is_dark_mode)  # Recolorer le nouvel histogramme
+        self.timeline_tab.apply_theme(self.is_dark_mode)  # Recolorer l'évolution de l'Elo
+        self.openings_tab.apply_theme(self.is_dark_mode)  # Recolorer la table des ouvertures
+
+    def setup_table_tab(self):
+        layout = QVBoxLayout()
+        self.table_tab.setLayout(layout)
+
+        # Création du tableau : modèle paresseux, qui trie lui-même ses lignes sur les clés précalculées
+        self.columns = TABLE_COLUMNS
+        self.table_model = GameTableModel(self.data, self.is_dark_mode)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        layout.addWidget(self.table)
+
+        # Barre de progression, bouton pour rafraîchir les données et bouton d'annulation
+        refresh_bar = QHBoxLayout()
+        layout.addLayout(refresh_bar)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        refresh_bar.addWidget(self.progress_bar)
+
+        self.refresh_button = QPushButton("Rafraîchir les données")
+        self.refresh_button.clicked.connect(lambda: self.refresh_data())
+        refresh_bar.addWidget(self.refresh_button)
+
+        self.cancel_button = QPushButton("Annuler")
+        self.cancel_button.clicked.connect(self.cancel_refresh)
+        self.cancel_button.setVisible(False)
+        refresh_bar.addWidget(self.cancel_button)
+
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setSortingEnabled(True)
+
+    # Renvoie True si les données affichées ont changé
+    def load_data(self, incremental=False):
+        # Le modèle ne construit aucune cellule : les vues lisent le jeu de données à la demande
+        if incremental:
+            return self.table_model.update_dataset(self.data)
+        self.table_model.set_dataset(self.data)
+        return True
+
+    # incremental : ne récupérer que les parties postérieures à la dernière analyse complète
+    def refresh_data(self, refresh_user=True, incremental=True):
+        # Recharger les données de tous les modes en arrière-plan : l'interface reste utilisable
+        if self.worker is not None:
+            return
+        # Un rafraîchissement demande aussi les classements à jour de l'utilisateur
+        if refresh_user:
+            rating_service.invalidate(self.context.username)
+        # La récupération sert à nouveau les classements expirés : la revalidation en cours est abandonnée
+        self.stop_revalidation()
+        self.stop_openings()
+        previous = self.analysis if incremental and self.analysis.high_water_mark is not None else None
+        self.worker = FetchWorker(self.context, previous)
+        self.worker.progress.connect(self.on_fetch_progress)
+        self.worker.partial.connect(self.on_fetch_partial)
+        self.worker.completed.connect(self.on_fetch_completed)
+        self.worker.cancelled.connect(self.on_fetch_ended)
+        self.worker.failed.connect(self.on_fetch_ended)
+        self.worker.finished.connect(self.worker.deleteLater)
+
+        self.refresh_button.setEnabled(False)
+        self.cancel_button.setVisible(True)
+        self.progress_bar.setRange(0, 0)  # Indéterminée jusqu'à la liste des archives
+        self.progress_bar.setFormat('Récupération des archives...')
+        self.progress_bar.setVisible(True)
+        self.worker.start()
+
+    def cancel_refresh(self):
+        if self.worker is not None:
+            self.cancel_button.setEnabled(False)
+            self.worker.cancel()
+
+    def on_fetch_progress(self, step, done, total):
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(done)
+        self.progress_bar.setFormat(f'{step} : %v / %m')
+
+    # Résultats partiels : afficher les parties déjà disponibles
+    def on_fetch_partial(self, analysis):
+        self.analysis = analysis
+        self.update_mode_selector()
+        self.load_mode_data(with_user_entry=False)
+        self.update_views(incremental=True)
+
+    def on_fetch_completed(self, analysis):
+        self.analysis = analysis
+        self.update_mode_selector()
+        self.load_mode_data()
+        self.update_views(incremental=True)
+        self.on_fetch_ended()
+        # Une plage de dates modifiée pendant la récupération vient de lancer la suivante :
+        # la revalidation et les ouvertures porteraient sur des données aussitôt remplacées
+        if self.worker is not None:
+            return
+        if analysis.stale_names:
+            self.start_revalidation()
+        self.start_openings()
+
+    # Revalider en arrière-plan les classements expirés de l'analyse affichée
+    def start_revalidation(self):
+        self.revalidator = RevalidateWorker(self.context, self.analysis)
+        self.revalidator.partial.connect(self.on_revalidated)
+        self.revalidator.completed.connect(self.on_revalidated)
+        self.revalidator.finished.connect(self.on_revalidation_finished)
+        self.revalidator.finished.connect(self.revalidator.deleteLater)
+        self.revalidator.start()
+
+    def stop_revalidation(self):
+        if self.revalidator is not None:
+            self.revalidator.cancel()
+            self.revalidator = None
+
+    # Classements revalidés : mettre à jour les lignes et les graphiques concernés
+    # (les signaux d'une revalidation abandonnée sont ignorés)
+    def on_revalidated(self, analysis):
+        if self.sender() is not self.revalidator:
+            return
+        self.analysis = analysis
+        self.load_mode_data()
+        self.update_views(incremental=True)
+
+    def on_revalidation_finished(self):
+        if self.sender() is self.revalidator:
+            self.revalidator = None
+
+    # Construire en arrière-plan l'index des ouvertures des parties récupérées
+    # (seuls les mois pas encore indexés sont analysés)
+    def start_openings(self):
+        self.openings_worker = OpeningsWorker(self.context, self.analysis.archive_files)
+        self.openings_worker.progress.connect(self.on_openings_progress)
+        self.openings_worker.completed.connect(self.on_openings_completed)
+        self.openings_worker.finished.connect(self.on_openings_finished)
+        self.openings_worker.finished.connect(self.openings_worker.deleteLater)
+        self.openings_tab.set_status('Analyse des ouvertures...')
+        self.openings_worker.start()
+
+    def stop_openings(self):
+        if self.openings_worker is not None:
+            self.openings_worker.cancel()
+            self.openings_worker = None
+
+    # Signaux de l'analyse des ouvertures (ceux d'une analyse abandonnée sont ignorés)
+    def on_openings_progress(self, step, done, total):
+        if self.sender() is self.openings_worker:
+            self.openings_tab.set_status(f'Analyse des ouvertures : {done} / {total} mois')
+
+    def on_openings_completed(self, opening_index):
+        if self.sender() is self.openings_worker:
+            self.openings_tab.set_index(opening_index)
+
+    def on_openings_finished(self):
+        if self.sender() is self.openings_worker:
+            self.openings_worker = None
+            self.openings_tab.show_summary()
+
+    # Fin de la récupération (terminée, annulée ou en échec) : les dernières données restent affichées
+    def on_fetch_ended(self, *args):
+        self.worker = None
+        self.refresh_button.setEnabled(True)
+        self.cancel_button.setEnabled(True)
+        self.cancel_button.setVisible(False)
+        self.progress_bar.setVisible(False)
+        if self.pending_date_range:
+            self.pending_date_range = False
+            self.change_date_range()
+
+    # Interrompre la récupération en cours avant de fermer la fenêtre
+    def closeEvent(self, event):
+        for worker in (self.worker, self.revalidator, self.openings_worker):
+            if worker is not None:
+                worker.cancel()
+                worker.wait()
+        super().closeEvent(event)
+
+    def apply_styles(self):
+        # Feuille de style précalculée, et recoloration des cellules par le modèle (sans reconstruction)
+        self.setStyleSheet(THEMES[self.is_dark_mode]['stylesheet'])
+        self.table_model.set_dark_mode(self.is_dark_mode)
+
+# Fonction pour lancer l'interface graphique
+def run_gui(argv, context):
+    app = QApplication(argv)
+
+    # Afficher la fenêtre immédiatement, les données arrivent en arrière-plan
+    window = ChessApp(MultiModeAnalysis(GameHistory.empty(), {}), context)
+    window.show()
+    window.refresh_data()
+    return app.exec_()
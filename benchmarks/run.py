@@ -0,0 +1,189 @@
+import os
+import sys
+import io
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+# Mesures de performance reproductibles d'appc, contre le serveur local de standin.py
+# Chaque mesure garde le meilleur temps sur plusieurs répétitions ; les résultats sont comparés
+# à une référence enregistrée (--save-baseline) et une régression fait échouer le programme.
+#
+#   python benchmarks/run.py --save-baseline           (enregistrer la référence)
+#   python benchmarks/run.py                           (comparer à la référence)
+#   python benchmarks/run.py --games 20000 --latency 0.05 --rate-429 0.02
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import appc
+from standin import SyntheticAccount, start_server
+
+BENCH_USER = 'bench'
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+NOISE_FLOOR = 0.002  # Écart minimal (secondes) pour signaler une régression
+
+# Fonction pour mesurer le meilleur temps d'une opération
+# setup() est appelée avant chaque répétition, hors mesure, et son résultat est passé à l'opération
+def measure(operation, repeat, setup=None):
+    best = None
+    for _ in range(repeat):
+        argument = setup() if setup is not None else None
+        start = time.perf_counter()
+        # Les messages d'appc ne sont pas affichés pendant les mesures
+        with contextlib.redirect_stdout(io.StringIO()):
+            if setup is not None:
+                operation(argument)
+            else:
+                operation()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+# Mesures du chargement des données (sans interface)
+def bench_pipeline(args, work_dir, results):
+    def fresh_context():
+        # Nouveau dossier de cache : ni archives, ni classements en cache
+        cache_dir = tempfile.mkdtemp(dir=work_dir)
+        appc.rating_service.invalidate()
+        return appc.AnalysisContext(BENCH_USER, 'rapid', None, cache_dir=cache_dir)
+
+    results['fetch_data_cold'] = measure(appc.fetch_data, args.repeat, setup=fresh_context)
+
+    context = fresh_context()
+    with contextlib.redirect_stdout(io.StringIO()):
+        analysis = appc.fetch_analysis(context)
+    results['fetch_data_warm'] = measure(lambda: appc.fetch_data(context), args.repeat)
+    # Ouverture de l'historique enregistré et lecture de toutes ses parties
+    history_dir = context.history_cache_dir()
+    results['history_store_load'] = measure(
+        lambda: appc.GameHistoryStore(history_dir).records['end_time'].sum(), args.repeat)
+
+    # Index des ouvertures : analyse de tous les PGN (archives déjà en cache), puis relecture des mois indexés
+    opening_dir = os.path.join(context.cache_dir, appc.OPENING_CACHE_SUBDIR)
+    results['fetch_openings_cold'] = measure(
+        lambda _: appc.fetch_openings(context), args.repeat, setup=lambda: shutil.rmtree(opening_dir, ignore_errors=True))
+    results['fetch_openings_warm'] = measure(lambda: appc.fetch_openings(context), args.repeat)
+
+    opponents = list(analysis.ratings)
+    rating_types = {f'chess_{mode}' for mode in analysis.modes()}
+    results['stats_cache_get_many'] = measure(
+        lambda: context.stats_cache.get_many(opponents, rating_types), args.repeat)
+    results['resolve_ratings_cold'] = measure(
+        lambda ctx: appc.resolve_player_ratings(ctx, opponents, rating_types), args.repeat, setup=fresh_context)
+    results['resolve_ratings_warm'] = measure(
+        lambda: appc.resolve_player_ratings(context, opponents, rating_types), args.repeat)
+    return analysis, context
+
+# Mesures de l'interface (ignorées si PyQt5 ou matplotlib ne sont pas installés)
+def bench_gui(args, analysis, context, results):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        import appc_gui
+        from PyQt5.QtWidgets import QApplication
+        from PyQt5.QtCore import Qt
+    except ImportError as e:
+        print(f"Mesures de l'interface ignorées : {e}")
+        return
+
+    app = QApplication.instance() or QApplication([])
+    with contextlib.redirect_stdout(io.StringIO()):
+        window = appc_gui.ChessApp(analysis, context)
+    window.show()
+    app.processEvents()
+
+    results['load_data'] = measure(window.load_data, args.repeat)
+
+    def sort_all_columns():
+        for column in range(window.table_model.columnCount()):
+            window.table.sortByColumn(column, Qt.AscendingOrder)
+            window.table.sortByColumn(column, Qt.DescendingOrder)
+        app.processEvents()
+    results['sort_all_columns'] = measure(sort_all_columns, args.repeat)
+
+    def plot(graph):
+        graph.plot_graph()
+        graph.canvas.draw()
+    results['progression_plot_graph'] = measure(lambda: plot(window.graph_tab), args.repeat)
+    results['histogram_plot_graph'] = measure(lambda: plot(window.elo_histogram_tab), args.repeat)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        window.openings_tab.opening_index = appc.fetch_openings(context)
+    results['openings_update_table'] = measure(window.openings_tab.update_table, args.repeat)
+    window.close()
+
+# Fonction pour comparer les résultats à la référence
+# Renvoie les noms des mesures en régression
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"{'Mesure':<26}{'Temps (ms)':>12}{'Référence':>12}{'Rapport':>10}")
+    for name, elapsed in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<26}{elapsed * 1000:>12.1f}{'-':>12}{'-':>10}")
+            continue
+        ratio = elapsed / reference if reference > 0 else float('inf')
+        regressed = elapsed > reference * (1 + tolerance) and elapsed - reference > NOISE_FLOOR
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<26}{elapsed * 1000:>12.1f}{reference * 1000:>12.1f}{ratio:>9.2f}x"
+              + ('  RÉGRESSION' if regressed else ''))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesures de performance d'appc contre une API simulée")
+    parser.add_argument('--games', type=int, default=5000, help="parties du compte synthétique")
+    parser.add_argument('--months', type=int, default=36, help="mois d'archives")
+    parser.add_argument('--opponents', type=int, default=1500, help="adversaires distincts")
+    parser.add_argument('--latency', type=float, default=0.0, help="délai ajouté à chaque réponse (secondes)")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="proportion de réponses 429 injectées")
+    parser.add_argument('--repeat', type=int, default=3, help="répétitions de chaque mesure (meilleur temps retenu)")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="hausse relative tolérée avant de signaler une régression")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="fichier de référence")
+    parser.add_argument('--save-baseline', action='store_true', help="enregistrer les résultats comme référence")
+    parser.add_argument('--no-gui', action='store_true', help="ne pas mesurer l'interface")
+    args = parser.parse_args(argv)
+
+    config = {
+        'games': args.games, 'months': args.months, 'opponents': args.opponents,
+        'latency': args.latency, 'rate_429': args.rate_429
+    }
+    account = SyntheticAccount(BENCH_USER, args.games, args.months, args.opponents)
+    server = start_server([account], latency=args.latency, rate_429=args.rate_429)
+    appc.API_BASE = server.api_base
+
+    work_dir = tempfile.mkdtemp(prefix='appc-bench-')
+    results = {}
+    try:
+        analysis, context = bench_pipeline(args, work_dir, results)
+        if not args.no_gui:
+            bench_gui(args, analysis, context, results)
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print(f"Requêtes servies : {server.counters['requests']} (dont {server.counters['throttled']} réponses 429)")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            stored = json.load(f)
+        if stored.get('config') == config:
+            baseline = stored['results']
+        else:
+            print(f"Référence ignorée : paramètres différents ({stored.get('config')})")
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'config': config, 'results': results}, f, indent=2)
+        print(f"Référence enregistrée dans {args.baseline}")
+        return 0
+    if regressions:
+        print(f"Régressions : {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
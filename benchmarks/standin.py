@@ -0,0 +1,259 @@
+import sys
+import time
+import json
+import gzip
+import random
+import threading
+import argparse
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Serveur local qui imite l'API publique de chess.com pour les mesures de performance :
+# /pub/player/{name}/games/archives, /pub/player/{name}/games/YYYY/MM et /pub/player/{name}/stats
+# Les comptes sont synthétiques (taille configurable) et générés de façon déterministe.
+
+TIME_CLASSES = ['rapid', 'rapid', 'blitz', 'blitz', 'blitz', 'bullet', 'daily']
+# Modes distincts, dans un ordre fixe (l'ordre d'un ensemble dépend de PYTHONHASHSEED)
+TIME_CLASS_NAMES = sorted(set(TIME_CLASSES))
+WIN_RESULTS = ['win']
+LOSS_RESULTS = ['checkmated', 'timeout', 'resigned']
+DRAW_RESULTS = ['agreed', 'repetition', 'stalemate', 'insufficient']
+PGN_SIZE = 1200  # Taille approximative d'un PGN, pour des archives de taille réaliste
+# Ouvertures des parties synthétiques : (code ECO, adresse chess.com, premiers coups)
+OPENINGS = [
+    ('C50', 'Italian-Game-Giuoco-Piano-Game-4.c3', 'e4 e5 Nf3 Nc6 Bc4 Bc5 c3'),
+    ('B20', 'Sicilian-Defense-Bowdler-Attack', 'e4 c5 Bc4 e6'),
+    ('B90', 'Sicilian-Defense-Open-Najdorf-Variation-6.Be3', 'e4 c5 Nf3 d6 d4 cxd4 Nxd4 Nf6 Nc3 a6 Be3'),
+    ('C00', 'French-Defense-Knight-Variation', 'e4 e6 Nf3 d5'),
+    ('D02', 'Queens-Pawn-Opening-Zukertort-Variation-2...Nf6', 'd4 d5 Nf3 Nf6'),
+    ('D06', 'Queens-Gambit-Declined-Marshall-Defense', 'd4 d5 c4 Nf6'),
+    ('A00', 'Van-t-Kruijs-Opening', 'e3 e5'),
+    ('B01', 'Scandinavian-Defense-Mieses-Kotrc-Variation', 'e4 d5 exd5 Qxd5 Nc3 Qa5'),
+    ('C42', 'Petrovs-Defense-3.Nxe5', 'e4 e5 Nf3 Nf6 Nxe5'),
+    ('A40', 'Englund-Gambit', 'd4 e5'),
+]
+RESULT_TAGS = {'win': '1-0', 'draw': '1/2-1/2', 'loss': '0-1'}
+
+# Compte synthétique : parties réparties sur des mois consécutifs terminés, contre un ensemble d'adversaires
+class SyntheticAccount:
+    def __init__(self, username, games=2000, months=24, opponents=500, seed=0):
+        self.username = username
+        rng = random.Random(f'{username}:{seed}')
+        opening_rng = random.Random(f'{username}:{seed}:openings')  # Tirage séparé : les autres données ne changent pas
+        self.opponents = [f'opp_{username}_{i}' for i in range(opponents)]
+
+        # Mois consécutifs se terminant avant le mois en cours (archives définitives)
+        now = datetime.now(timezone.utc)
+        year, month = now.year, now.month
+        self.months = []
+        for _ in range(months):
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+            self.months.append((year, month))
+        self.months.reverse()
+
+        # Répartition des parties par mois, avec un Elo qui évolue au fil des parties
+        self.games_by_month = {key: [] for key in self.months}
+        elo = {time_class: 1200 for time_class in TIME_CLASS_NAMES}
+        for i in range(games):
+            year, month = self.months[i * len(self.months) // games]
+            start = datetime(year, month, 1, tzinfo=timezone.utc).timestamp()
+            end_time = int(start + rng.uniform(0, 27 * 24 * 3600))
+            time_class = rng.choice(TIME_CLASSES)
+            opponent = rng.choice(self.opponents)
+            opponent_rating = max(100, int(rng.gauss(elo[time_class], 150)))
+            outcome = rng.random()
+            if outcome < 0.47:
+                user_result, opponent_result = 'win', rng.choice(LOSS_RESULTS)
+                elo[time_class] += 8
+            elif outcome < 0.94:
+                user_result, opponent_result = rng.choice(LOSS_RESULTS), 'win'
+                elo[time_class] -= 8
+            else:
+                user_result = opponent_result = rng.choice(DRAW_RESULTS)
+            user_side = {'username': username, 'rating': elo[time_class], 'result': user_result}
+            opponent_side = {'username': opponent, 'rating': opponent_rating, 'result': opponent_result}
+            white, black = (user_side, opponent_side) if rng.random() < 0.5 else (opponent_side, user_side)
+            eco, eco_url = None, None
+            if opening_rng.random() < 0.95:  # Quelques parties sans ouverture reconnue
+                eco, slug, _ = opening_rng.choice(OPENINGS)
+                eco_url = f'https://www.chess.com/openings/{slug}'
+            self.games_by_month[(year, month)].append({
+                'url': f'https://www.chess.com/game/live/{seed}{i}',
+                'pgn': synthetic_pgn(white, black, end_time, eco, eco_url, opening_rng),
+                'eco': eco_url,
+                'time_class': time_class,
+                'rated': rng.random() < 0.9,
+                'end_time': end_time,
+                'white': white,
+                'black': black
+            })
+        for games_of_month in self.games_by_month.values():
+            games_of_month.sort(key=lambda game: game['end_time'])
+
+        self.current_elo = dict(elo)
+        self.opponent_stats = {
+            name.lower(): {
+                f'chess_{time_class}': {'last': {'rating': rng.randint(400, 2400)}}
+                for time_class in TIME_CLASS_NAMES
+            }
+            for name in self.opponents
+        }
+
+    def stats(self, name):
+        if name.lower() == self.username.lower():
+            return {f'chess_{time_class}': {'last': {'rating': elo}} for time_class, elo in self.current_elo.items()}
+        return self.opponent_stats.get(name.lower())
+
+# PGN au format de chess.com (en-têtes, coups avec la pendule), complété jusqu'à PGN_SIZE octets environ
+def synthetic_pgn(white, black, end_time, eco, eco_url, rng):
+    if white['result'] == 'win':
+        result = RESULT_TAGS['win']
+    elif black['result'] == 'win':
+        result = RESULT_TAGS['loss']
+    else:
+        result = RESULT_TAGS['draw']
+    date = datetime.fromtimestamp(end_time, timezone.utc).strftime('%Y.%m.%d')
+    tags = [('Event', 'Live Chess'), ('Site', 'Chess.com'), ('Date', date), ('Round', '-'),
+            ('White', white['username']), ('Black', black['username']), ('Result', result)]
+    if eco is not None:
+        tags += [('ECO', eco), ('ECOUrl', eco_url)]
+    tags += [('WhiteElo', str(white['rating'])), ('BlackElo', str(black['rating'])), ('TimeControl', '600')]
+    opening_moves = next((moves for code, _, moves in OPENINGS if code == eco), rng.choice(OPENINGS)[2]).split()
+    moves = []
+    size = sum(len(name) + len(value) + 6 for name, value in tags)
+    ply = 0
+    while size < PGN_SIZE:
+        san = opening_moves[ply] if ply < len(opening_moves) else rng.choice(['Nf3', 'Nc6', 'Be2', 'h6', 'Rd1', 'Qe7'])
+        number = f'{ply // 2 + 1}. ' if ply % 2 == 0 else f'{ply // 2 + 1}... '
+        move = f'{number}{san} {{[%clk 0:0{9 - ply % 10}:5{ply % 10}.{ply % 7}]}}'
+        moves.append(move)
+        size += len(move) + 1
+        ply += 1
+    return '\n'.join(f'[{name} "{value}"]' for name, value in tags) + '\n\n' + ' '.join(moves) + f' {result}\n'
+
+# Serveur HTTP (connexions persistantes, réponses compressées si le client l'accepte)
+# latency : délai ajouté à chaque réponse (secondes) ; rate_429 : proportion de réponses 429 injectées
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, accounts, port=0, latency=0.0, rate_429=0.0, seed=0):
+        super().__init__(('127.0.0.1', port), StandInHandler)
+        self.accounts = {account.username.lower(): account for account in accounts}
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'throttled': 0}
+        self.bodies = {}  # Corps déjà sérialisés (et compressés), par chemin
+
+    @property
+    def api_base(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/pub'
+
+    def route(self, path):
+        parts = path.strip('/').split('/')
+        if len(parts) < 4 or parts[:2] != ['pub', 'player']:
+            return None
+        name = parts[2].lower()
+        if parts[3:] == ['stats']:
+            for account in self.accounts.values():
+                stats = account.stats(name)
+                if stats is not None:
+                    return stats
+            return None
+        account = self.accounts.get(name)
+        if account is None or parts[3] != 'games':
+            return None
+        if parts[4:] == ['archives']:
+            return {'archives': [f'{self.api_base}/player/{account.username}/games/{year}/{month:02d}'
+                                 for year, month in account.months]}
+        if len(parts) == 6:
+            games = account.games_by_month.get((int(parts[4]), int(parts[5])))
+            return {'games': games} if games is not None else None
+        return None
+
+    # Corps de la réponse d'un chemin (None : 404), mis en cache
+    def body(self, path, compressed):
+        key = (path, compressed)
+        if key not in self.bodies:
+            data = self.route(path)
+            if data is None:
+                return None
+            raw = json.dumps(data).encode()
+            self.bodies[(path, False)] = raw
+            self.bodies[(path, True)] = gzip.compress(raw, compresslevel=5)
+        return self.bodies[key]
+
+    def throttle(self):
+        with self.lock:
+            self.counters['requests'] += 1
+            throttled = self.rng.random() < self.rate_429
+            if throttled:
+                self.counters['throttled'] += 1
+        return throttled
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        if server.throttle():
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        compressed = 'gzip' in self.headers.get('Accept-Encoding', '')
+        body = server.body(self.path, compressed)
+        if body is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+# Fonction pour démarrer le serveur dans un fil en arrière-plan
+def start_server(accounts, port=0, latency=0.0, rate_429=0.0, seed=0):
+    server = StandInServer(accounts, port, latency, rate_429, seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# Exécution autonome : python benchmarks/standin.py --user bench --games 5000 --port 8765
+# puis APPC_API_BASE=http://127.0.0.1:8765/pub python appc.py --user bench
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur local imitant l'API de chess.com")
+    parser.add_argument('--user', action='append', help="pseudo d'un compte synthétique (répétable)")
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--opponents', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.0, help="délai ajouté à chaque réponse (secondes)")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="proportion de réponses 429 injectées")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    accounts = [SyntheticAccount(name, args.games, args.months, args.opponents, args.seed)
+                for name in (args.user or ['bench'])]
+    server = start_server(accounts, args.port, args.latency, args.rate_429, args.seed)
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] API simulée sur {server.api_base}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())